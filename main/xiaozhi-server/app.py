@@ -1,7 +1,9 @@
+import os
 import sys
 import uuid
 import signal
 import asyncio
+import argparse
 from aioconsole import ainput
 from config.settings import load_config
 from config.logger import setup_logging
@@ -9,6 +11,14 @@ from core.utils.util import get_local_ip
 from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
+from core.utils.audio_decode import check_audio_decoders
+from core.utils.workers import (
+    WORKER_ID_ENV,
+    WorkerSupervisor,
+    get_worker_id,
+    publish_worker_stats,
+    reuse_port_supported,
+)
 
 TAG = __name__
 logger = setup_logging()
@@ -42,20 +52,31 @@ async def monitor_stdin():
         await ainput()  # Asynchronously wait for input, consume Enter
 
 
-async def main():
-    check_ffmpeg_installed()
-    config = load_config()
-
-    # Use manager-api's secret as auth_key by default
-    # If secret is empty, generate a random key
-    # auth_key is used for jwt authentication, e.g., for vision analysis API
+def get_auth_key(config):
+    """
+    Use manager-api's secret as auth_key by default
+    If secret is empty, generate a random key
+    auth_key is used for jwt authentication, e.g., for vision analysis API
+    """
     auth_key = config.get("manager-api", {}).get("secret", "")
     if not auth_key or len(auth_key) == 0 or "你" in auth_key:
         auth_key = str(uuid.uuid4().hex)
-    config["server"]["auth_key"] = auth_key
+    return auth_key
 
-    # Add stdin monitoring task
-    stdin_task = asyncio.create_task(monitor_stdin())
+
+async def main(auth_key=None):
+    check_ffmpeg_installed()
+    config = load_config()
+    config["server"]["auth_key"] = auth_key or get_auth_key(config)
+    worker_id = get_worker_id()
+    if worker_id is None:
+        check_audio_decoders()
+
+    # Add stdin monitoring task, worker processes have no stdin
+    if worker_id is None:
+        stdin_task = asyncio.create_task(monitor_stdin())
+    else:
+        stdin_task = asyncio.create_task(publish_worker_stats())
 
     # Start WebSocket server
     ws_server = WebSocketServer(config)
@@ -64,41 +85,43 @@ async def main():
     ota_server = SimpleHttpServer(config)
     ota_task = asyncio.create_task(ota_server.start())
 
-    read_config_from_api = config.get("read_config_from_api", False)
-    port = int(config["server"].get("http_port", 8003))
-    if not read_config_from_api:
+    # In worker mode only the first worker prints the addresses
+    if not worker_id:
+        read_config_from_api = config.get("read_config_from_api", False)
+        port = int(config["server"].get("http_port", 8003))
+        if not read_config_from_api:
+            logger.bind(tag=TAG).info(
+                "OTA API URL:\t\thttp://{}:{}/xiaozhi/ota/",
+                get_local_ip(),
+                port,
+            )
         logger.bind(tag=TAG).info(
-            "OTA API URL:\t\thttp://{}:{}/xiaozhi/ota/",
+            "Vision analysis API:\thttp://{}:{}/mcp/vision/explain",
             get_local_ip(),
             port,
         )
-    logger.bind(tag=TAG).info(
-        "Vision analysis API:\thttp://{}:{}/mcp/vision/explain",
-        get_local_ip(),
-        port,
-    )
 
-    # Get WebSocket configuration, use safe default values
-    websocket_port = 8000
-    server_config = config.get("server", {})
-    if isinstance(server_config, dict):
-        websocket_port = int(server_config.get("port", 8000))
+        # Get WebSocket configuration, use safe default values
+        websocket_port = 8000
+        server_config = config.get("server", {})
+        if isinstance(server_config, dict):
+            websocket_port = int(server_config.get("port", 8000))
 
-    logger.bind(tag=TAG).info(
-        "WebSocket URL:\t\tws://{}:{}/xiaozhi/v1/",
-        get_local_ip(),
-        websocket_port,
-    )
+        logger.bind(tag=TAG).info(
+            "WebSocket URL:\t\tws://{}:{}/xiaozhi/v1/",
+            get_local_ip(),
+            websocket_port,
+        )
 
-    logger.bind(tag=TAG).info(
-        "=======The address above is for WebSocket protocol, do not access with browser======="
-    )
-    logger.bind(tag=TAG).info(
-        "To test WebSocket, please open test_page.html in the test directory with Chrome"
-    )
-    logger.bind(tag=TAG).info(
-        "=============================================================\n"
-    )
+        logger.bind(tag=TAG).info(
+            "=======The address above is for WebSocket protocol, do not access with browser======="
+        )
+        logger.bind(tag=TAG).info(
+            "To test WebSocket, please open test_page.html in the test directory with Chrome"
+        )
+        logger.bind(tag=TAG).info(
+            "=============================================================\n"
+        )
 
     try:
         await wait_for_exit()  # Block until exit signal is received
@@ -120,8 +143,42 @@ async def main():
         print("Server closed, program exiting.")
 
 
-if __name__ == "__main__":
+def run_worker(worker_id, auth_key):
+    """Entry point of a worker process started by WorkerSupervisor"""
+    os.environ[WORKER_ID_ENV] = str(worker_id)
     try:
-        asyncio.run(main())
+        asyncio.run(main(auth_key))
     except KeyboardInterrupt:
-        print("Manual interruption, program terminated.")
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="xiaozhi-esp32-server")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes sharing the listening ports via SO_REUSEPORT, "
+        "defaults to server.workers in config",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = load_config()
+    workers = args.workers or int(config["server"].get("workers", 1) or 1)
+    if workers > 1 and not reuse_port_supported():
+        logger.bind(tag=TAG).warning(
+            "SO_REUSEPORT is not supported on this platform, running a single process"
+        )
+        workers = 1
+
+    if workers > 1:
+        # The auth_key must be identical in all workers, so it is generated once here
+        WorkerSupervisor(workers, run_worker, args=(get_auth_key(config),)).run()
+    else:
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            print("Manual interruption, program terminated.")
@@ -2,6 +2,7 @@ import os
 import argparse
 import yaml
 from collections.abc import Mapping
+from config.layered_config import to_plain_dict
 from config.manage_api_client import init_service, get_server_config, get_agent_models
 
 
@@ -65,15 +66,18 @@ def get_config_from_api(config):
             "ip": config["server"].get("ip", ""),
             "port": config["server"].get("port", ""),
             "http_port": config["server"].get("http_port", ""),
+            "workers": config["server"].get("workers", 1),
             "vision_explain": config["server"].get("vision_explain", ""),
             "auth_key": config["server"].get("auth_key", ""),
         }
     return config_data
 
 
-def get_private_config_from_api(config, device_id, client_id):
+async def get_private_config_from_api(config, device_id, client_id):
     """Get private configuration from Java API"""
-    return get_agent_models(device_id, client_id, config["selected_module"])
+    return await get_agent_models(
+        device_id, client_id, to_plain_dict(config["selected_module"])
+    )
 
 
 def ensure_directories(config):
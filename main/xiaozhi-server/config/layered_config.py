@@ -0,0 +1,83 @@
+from collections.abc import Mapping, MutableMapping
+
+# 标记在覆盖层中被删除的键
+_DELETED = object()
+
+
+class LayeredConfig(MutableMapping):
+    """写时复制的分层配置
+
+    底层是所有连接共享的服务端配置，只读不写；每个连接只持有一个很薄的覆盖层，
+    写入和删除只落在覆盖层，读取时先查覆盖层，找不到再落到底层配置。
+    访问嵌套的字典时按需返回子覆盖层，修改 config["selected_module"]["TTS"]
+    这类嵌套的值同样不会影响底层配置。
+
+    创建连接时不再需要深拷贝整个配置树，成本和配置大小无关。
+    """
+
+    __slots__ = ("_base", "_overlay", "_children")
+
+    def __init__(self, base: Mapping):
+        self._base = base
+        self._overlay = {}
+        self._children = {}
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            value = self._overlay[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        value = self._base[key]
+        if isinstance(value, Mapping):
+            child = self._children[key] = LayeredConfig(value)
+            return child
+        if isinstance(value, list):
+            # 列表可能被原地修改，首次访问时复制一份到覆盖层
+            value = self._overlay[key] = list(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._children.pop(key, None)
+        self._overlay[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._children.pop(key, None)
+        self._overlay[key] = _DELETED
+
+    def __contains__(self, key):
+        if key in self._overlay:
+            return self._overlay[key] is not _DELETED
+        return key in self._base
+
+    def __iter__(self):
+        for key in self._base:
+            if self._overlay.get(key) is not _DELETED:
+                yield key
+        for key, value in self._overlay.items():
+            if key not in self._base and value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"LayeredConfig({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        """合并底层和覆盖层，返回一份独立的普通字典"""
+        return to_plain_dict(self)
+
+
+def to_plain_dict(value):
+    """把配置（含LayeredConfig）递归转换为普通的dict/list，结果可以被json序列化和修改"""
+    if isinstance(value, Mapping):
+        return {key: to_plain_dict(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_plain_dict(item) for item in value]
+    return value
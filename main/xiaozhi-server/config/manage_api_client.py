@@ -1,6 +1,8 @@
 import os
+import copy
 import time
 import base64
+import asyncio
 from typing import Optional, Dict
 
 import httpx
@@ -21,6 +23,8 @@ class DeviceBindException(Exception):
 class ManageApiClient:
     _instance = None
     _client = None
+    _async_client = None
+    _async_client_loop = None
     _secret = None
 
     def __new__(cls, config):
@@ -47,17 +51,32 @@ class ManageApiClient:
         cls._secret = cls.config.get("secret")
         cls.max_retries = cls.config.get("max_retries", 6)  # 最大重试次数
         cls.retry_delay = cls.config.get("retry_delay", 10)  # 初始重试延迟(秒)
+        # 设备差异化配置的缓存时间(秒)，0表示不缓存
+        cls.agent_models_cache_ttl = cls.config.get("agent_models_cache_ttl", 300)
         # NOTE(goody): 2025/4/16 http相关资源统一管理，后续可以增加线程池或者超时
         # 后续也可以统一配置apiToken之类的走通用的Auth
-        cls._client = httpx.Client(
-            base_url=cls.config.get("url"),
-            headers={
+        cls._client = httpx.Client(**cls._client_kwargs())
+
+    @classmethod
+    def _client_kwargs(cls) -> Dict:
+        return {
+            "base_url": cls.config.get("url"),
+            "headers": {
                 "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
                 "Accept": "application/json",
                 "Authorization": "Bearer " + cls._secret,
             },
-            timeout=cls.config.get("timeout", 30),  # 默认超时时间30秒
-        )
+            "timeout": cls.config.get("timeout", 30),  # 默认超时时间30秒
+        }
+
+    @classmethod
+    def _get_async_client(cls) -> httpx.AsyncClient:
+        """获取当前事件循环的异步连接池，连接池不能跨事件循环复用"""
+        loop = asyncio.get_running_loop()
+        if cls._async_client is None or cls._async_client_loop is not loop:
+            cls._async_client = httpx.AsyncClient(**cls._client_kwargs())
+            cls._async_client_loop = loop
+        return cls._async_client
 
     @classmethod
     def _request(cls, method: str, endpoint: str, **kwargs) -> Dict:
@@ -66,8 +85,18 @@ class ManageApiClient:
         response = cls._client.request(method, endpoint, **kwargs)
         response.raise_for_status()
 
-        result = response.json()
+        return cls._parse_result(response.json())
 
+    @classmethod
+    async def _async_request(cls, method: str, endpoint: str, **kwargs) -> Dict:
+        """异步发送单次HTTP请求并处理响应"""
+        endpoint = endpoint.lstrip("/")
+        response = await cls._get_async_client().request(method, endpoint, **kwargs)
+        response.raise_for_status()
+        return cls._parse_result(response.json())
+
+    @staticmethod
+    def _parse_result(result: Dict) -> Dict:
         # 处理API返回的业务错误
         if result.get("code") == 10041:
             raise DeviceNotFoundException(result.get("msg"))
@@ -117,6 +146,25 @@ class ManageApiClient:
                     # 不重试，直接抛出异常
                     raise
 
+    @classmethod
+    async def _async_execute_request(cls, method: str, endpoint: str, **kwargs) -> Dict:
+        """带重试机制的异步请求执行器，重试等待不会阻塞事件循环"""
+        retry_count = 0
+
+        while retry_count <= cls.max_retries:
+            try:
+                return await cls._async_request(method, endpoint, **kwargs)
+            except Exception as e:
+                if retry_count < cls.max_retries and cls._should_retry(e):
+                    retry_count += 1
+                    print(
+                        f"{method} {endpoint} 请求失败，将在 {cls.retry_delay:.1f} 秒后进行第 {retry_count} 次重试"
+                    )
+                    await asyncio.sleep(cls.retry_delay)
+                    continue
+                else:
+                    raise
+
     @classmethod
     def safe_close(cls):
         """安全关闭连接池"""
@@ -130,11 +178,66 @@ def get_server_config() -> Optional[Dict]:
     return ManageApiClient._instance._execute_request("POST", "/config/server-base")
 
 
-def get_agent_models(
-    mac_address: str, client_id: str, selected_module: Dict
-) -> Optional[Dict]:
-    """获取代理模型配置"""
-    return ManageApiClient._instance._execute_request(
+# 设备差异化配置缓存 {(mac_address, client_id): (过期时间, 配置)}
+_agent_models_cache = {}
+# 正在请求中的设备配置 {(mac_address, client_id): Task}，同一设备同时只请求一次
+_agent_models_inflight = {}
+# 缓存每次被清空时加一，清空前发出的请求结果不再写入缓存
+_agent_models_epoch = 0
+# 清理过期缓存的间隔（秒）
+AGENT_MODELS_SWEEP_INTERVAL = 60
+_agent_models_next_sweep = 0.0
+# 多进程模式下各工作进程各有一份缓存，清空缓存时替换这个文件，
+# 其他工作进程发现文件变化后也清空自己的缓存
+AGENT_MODELS_GENERATION_FILE = os.path.join("tmp", "agent_models.generation")
+# 检查版本文件的最小间隔（秒），避免每次获取配置都访问文件系统
+AGENT_MODELS_GENERATION_CHECK_INTERVAL = 1
+_agent_models_generation = None
+_agent_models_next_check = 0.0
+
+
+def _reset_agent_models_cache():
+    global _agent_models_epoch
+    _agent_models_cache.clear()
+    _agent_models_inflight.clear()
+    _agent_models_epoch += 1
+
+
+def _check_agent_models_generation(now):
+    """其他进程清空过缓存时，清空本进程的缓存"""
+    global _agent_models_generation, _agent_models_next_check
+    if now < _agent_models_next_check:
+        return
+    _agent_models_next_check = now + AGENT_MODELS_GENERATION_CHECK_INTERVAL
+    try:
+        # 文件通过os.replace整体替换，inode或修改时间变化即表示有新版本
+        stat = os.stat(AGENT_MODELS_GENERATION_FILE)
+        generation = (stat.st_ino, stat.st_mtime_ns)
+    except OSError:
+        generation = None
+    if generation != _agent_models_generation:
+        _reset_agent_models_cache()
+        _agent_models_generation = generation
+
+
+def _sweep_expired_agent_models(now):
+    """定期删除过期的缓存，避免见过的每个设备都一直留在缓存里"""
+    global _agent_models_next_sweep
+    if now < _agent_models_next_sweep:
+        return
+    _agent_models_next_sweep = now + AGENT_MODELS_SWEEP_INTERVAL
+    expired = [
+        key
+        for key, (expire_at, _) in _agent_models_cache.items()
+        if expire_at <= now
+    ]
+    for key in expired:
+        del _agent_models_cache[key]
+
+
+async def _fetch_agent_models(key, mac_address, client_id, selected_module):
+    epoch = _agent_models_epoch
+    result = await ManageApiClient._instance._async_execute_request(
         "POST",
         "/config/agent-models",
         json={
@@ -143,6 +246,62 @@ def get_agent_models(
             "selectedModule": selected_module,
         },
     )
+    ttl = ManageApiClient.agent_models_cache_ttl
+    if ttl and result is not None and epoch == _agent_models_epoch:
+        _agent_models_cache[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+    return result
+
+
+async def get_agent_models(
+    mac_address: str, client_id: str, selected_module: Dict
+) -> Optional[Dict]:
+    """获取代理模型配置，按设备缓存，设备短时间内重连直接命中缓存
+
+    同一设备同时发起的多个请求只向智控台请求一次，重启或网络恢复后大量设备同时重连时
+    不会把请求全部压到智控台
+    """
+    key = (mac_address, client_id)
+    now = time.monotonic()
+    _check_agent_models_generation(now)
+    _sweep_expired_agent_models(now)
+    cached = _agent_models_cache.get(key)
+    if cached is not None:
+        if cached[0] > now:
+            return copy.deepcopy(cached[1])
+        del _agent_models_cache[key]
+
+    task = _agent_models_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _fetch_agent_models(key, mac_address, client_id, selected_module)
+        )
+        _agent_models_inflight[key] = task
+
+        def _done(finished):
+            if _agent_models_inflight.get(key) is finished:
+                del _agent_models_inflight[key]
+
+        task.add_done_callback(_done)
+    # 某个等待方被取消不影响其他等待同一请求的连接
+    result = await asyncio.shield(task)
+    return copy.deepcopy(result)
+
+
+def clear_agent_models_cache():
+    """清空设备差异化配置缓存，在收到update_config时调用，所有工作进程都会失效"""
+    global _agent_models_generation
+    _reset_agent_models_cache()
+    try:
+        os.makedirs(os.path.dirname(AGENT_MODELS_GENERATION_FILE), exist_ok=True)
+        tmp_path = f"{AGENT_MODELS_GENERATION_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{os.getpid()}-{time.time_ns()}")
+        os.replace(tmp_path, AGENT_MODELS_GENERATION_FILE)
+        # 本进程已经清空过，不需要在下次检查时再清空一次
+        stat = os.stat(AGENT_MODELS_GENERATION_FILE)
+        _agent_models_generation = (stat.st_ino, stat.st_mtime_ns)
+    except OSError as e:
+        print(f"更新设备配置缓存版本失败: {e}")
 
 
 def save_mem_local_short(mac_address: str, short_momery: str) -> Optional[Dict]:
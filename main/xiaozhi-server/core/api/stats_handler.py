@@ -0,0 +1,29 @@
+import json
+from aiohttp import web
+from core.utils.workers import aggregate_worker_stats
+from core.api.base_handler import BaseHandler
+
+TAG = __name__
+
+
+class StatsHandler(BaseHandler):
+    def __init__(self, config: dict):
+        super().__init__(config)
+
+    async def handle_get(self, request):
+        """返回运行指标，多进程模式下汇总全部工作进程"""
+        try:
+            response = web.Response(
+                text=json.dumps(aggregate_worker_stats(), ensure_ascii=False),
+                content_type="application/json",
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取运行指标异常: {e}")
+            response = web.Response(
+                text=json.dumps({"success": False, "message": str(e)}),
+                content_type="application/json",
+                status=500,
+            )
+        finally:
+            self._add_cors_headers(response)
+            return response
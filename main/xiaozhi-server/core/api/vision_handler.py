@@ -4,7 +4,9 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.utils.util import get_vision_url, is_valid_image_file
 from core.utils.vllm import create_instance
+from core.utils.provider_pool import get_shared_provider
 from config.config_loader import get_private_config_from_api
+from config.layered_config import to_plain_dict
 from core.utils.auth import AuthToken
 import base64
 from typing import Tuple, Optional
@@ -99,7 +101,7 @@ class VisionHandler:
             current_config = copy.deepcopy(self.config)
             read_config_from_api = current_config.get("read_config_from_api", False)
             if read_config_from_api:
-                current_config = get_private_config_from_api(
+                current_config = await get_private_config_from_api(
                     current_config,
                     device_id,
                     client_id,
@@ -118,8 +120,11 @@ class VisionHandler:
             if not vllm_type:
                 raise ValueError(f"无法找到VLLM模块对应的供应器{vllm_type}")
 
-            vllm = create_instance(
-                vllm_type, current_config["VLLM"][select_vllm_module]
+            vllm = get_shared_provider(
+                "VLLM",
+                vllm_type,
+                create_instance,
+                to_plain_dict(current_config["VLLM"][select_vllm_module]),
             )
 
             result = vllm.response(question, image_base64)
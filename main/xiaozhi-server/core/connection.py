@@ -1,10 +1,9 @@
 import os
 import sys
-import copy
 import json
 import uuid
 import time
-import queue
+import signal
 import asyncio
 import threading
 import traceback
@@ -25,8 +24,12 @@ from core.utils.modules_initialize import (
     initialize_asr,
 )
 from core.handle.reportHandle import report
+from core.utils.async_queue import AsyncQueue
+from core.utils.uplink_audio import UplinkAudio, UtteranceBuffer
+from core.utils.executor import run_blocking, get_task_executor, get_chat_executor
+from core.utils.provider_pool import get_shared_provider
+from core.utils.workers import is_worker_process
 from core.providers.tts.default import DefaultTTS
-from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
 from core.providers.asr.dto.dto import InterfaceType
 from core.handle.textHandle import handleTextMessage
@@ -35,6 +38,7 @@ from plugins_func.loadplugins import auto_import_modules
 from plugins_func.register import Action, ActionResponse
 from core.auth import AuthMiddleware, AuthenticationError
 from config.config_loader import get_private_config_from_api
+from config.layered_config import LayeredConfig, to_plain_dict
 from core.providers.tts.dto.dto import ContentType, TTSMessageDTO, SentenceType
 from config.logger import setup_logging, build_module_string, update_module_string
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
@@ -61,7 +65,8 @@ class ConnectionHandler:
         server=None,
     ):
         self.common_config = config
-        self.config = copy.deepcopy(config)
+        # 服务端配置作为只读底层，连接的差异化配置只写入覆盖层
+        self.config = LayeredConfig(config)
         self.session_id = str(uuid.uuid4())
         self.logger = setup_logging()
         self.server = server  # 保存server实例的引用
@@ -90,11 +95,14 @@ class ConnectionHandler:
         # 线程任务相关
         self.loop = asyncio.get_event_loop()
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
-
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 连接在服务端共享线程池中的执行句柄，和其他连接公平轮询调度
+        self.executor = get_task_executor().for_connection(self.session_id)
+        # 大模型对话单独排队，长时间的对话不会占满处理短任务的线程
+        self.chat_executor = get_chat_executor().for_connection(self.session_id)
+
+        # 聊天记录上报任务
+        self.report_queue = AsyncQueue(self.loop)
+        self.report_task = None
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -110,17 +118,27 @@ class ConnectionHandler:
         self.intent = _intent
 
         # vad相关变量
-        self.client_audio_buffer = bytearray()
+        # 每个连接独立的VAD会话（音频缓冲区、模型状态），在首次检测时创建
+        self.vad_session = None
         self.client_have_voice = False
         self.client_have_voice_last_time = 0.0
         self.client_no_voice_last_time = 0.0
         self.client_voice_stop = False
+        # 说话后已经持续静音的时长(毫秒)
+        self.client_silence_ms = 0.0
+
+        # 上行音频解码，每个音频包只解码一次，VAD、ASR和上报共用解码后的PCM
+        self.uplink_audio = UplinkAudio(self.audio_format)
 
         # asr相关变量
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
-        self.asr_audio = []
-        self.asr_audio_queue = queue.Queue()
+        # 当前这句话的PCM帧
+        self.asr_audio = UtteranceBuffer()
+        # 临时端点上提前开始的推测识别和意图识别
+        self.asr_speculation = None
+        self.speculative_intent = None
+        self.asr_audio_queue = AsyncQueue(self.loop)
 
         # llm相关变量
         self.llm_finish_task = True
@@ -144,7 +162,8 @@ class ConnectionHandler:
         self.load_function_plugin = False
         self.intent_type = "nointent"
 
-        self.timeout_task = None
+        # 最后一次收到消息的时间，由服务端的空闲连接清理任务统一检查超时
+        self.last_activity_time = time.monotonic()
         self.timeout_seconds = (
             int(self.config.get("close_connection_no_voice_time", 120)) + 60
         )  # 在原来第一道关闭的基础上加60秒，进行二道关闭
@@ -188,15 +207,15 @@ class ConnectionHandler:
             self.websocket = ws
             self.device_id = self.headers.get("device-id", None)
 
-            # 启动超时检查任务
-            self.timeout_task = asyncio.create_task(self._check_timeout())
+            # 超时检查从认证通过开始计时
+            self.reset_timeout()
 
-            self.welcome_msg = self.config["xiaozhi"]
+            self.welcome_msg = to_plain_dict(self.config["xiaozhi"])
             self.welcome_msg["session_id"] = self.session_id
             await self.websocket.send(json.dumps(self.welcome_msg))
 
             # 获取差异化配置
-            self._initialize_private_config()
+            await self._initialize_private_config()
             # 异步初始化
             self.executor.submit(self._initialize_components)
 
@@ -242,16 +261,21 @@ class ConnectionHandler:
             # 立即关闭连接，不等待记忆保存完成
             await self.close(ws)
 
-    async def reset_timeout(self):
-        """重置超时计时器"""
-        if self.timeout_task:
-            self.timeout_task.cancel()
-        self.timeout_task = asyncio.create_task(self._check_timeout())
+    def reset_timeout(self):
+        """重置超时计时器，只记录活跃时间，不创建任务"""
+        self.last_activity_time = time.monotonic()
+
+    def is_idle_timeout(self, now: float) -> bool:
+        """连接是否已经超过timeout_seconds没有任何消息"""
+        return (
+            not self.stop_event.is_set()
+            and now - self.last_activity_time > self.timeout_seconds
+        )
 
     async def _route_message(self, message):
         """消息路由"""
         # 重置超时计时器
-        await self.reset_timeout()
+        self.reset_timeout()
 
         if isinstance(message, str):
             await handleTextMessage(self, message)
@@ -280,6 +304,12 @@ class ConnectionHandler:
                 )
             )
 
+            # 多进程模式下由守护进程依次重启全部工作进程
+            if is_worker_process():
+                self.logger.bind(tag=TAG).info("通知守护进程重启工作进程...")
+                os.kill(os.getppid(), signal.SIGHUP)
+                return
+
             # 异步执行重启操作
             def restart_server():
                 """实际执行重启的方法"""
@@ -344,23 +374,22 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
+            """初始化上报任务"""
+            self.loop.call_soon_threadsafe(self._init_report_task)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"实例化组件失败: {e}")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
+    def _init_report_task(self):
+        """初始化ASR和TTS上报任务，需要在事件循环中调用"""
         if not self.read_config_from_api or self.need_bind:
             return
         if self.chat_history_conf == 0:
             return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
+        if self.stop_event.is_set():
+            return
+        if self.report_task is None or self.report_task.done():
+            self.report_task = asyncio.create_task(self._report_worker())
+            self.logger.bind(tag=TAG).info("聊天记录上报任务已启动")
 
     def _initialize_tts(self):
         """初始化TTS"""
@@ -380,20 +409,20 @@ class ConnectionHandler:
             # 因为本地一个实例ASR，可以被多个连接共享
             asr = self._asr
         else:
-            # 如果公共ASR是远程服务，则初始化一个新实例
-            # 因为远程ASR，涉及到websocket连接和接收线程，需要每个连接一个实例
+            # 如果公共ASR是远程服务，则从共享池获取实例
+            # 非流式ASR相同配置的连接共享一个实例，流式ASR涉及websocket连接，仍然每个连接一个实例
             asr = initialize_asr(self.config)
 
         return asr
 
-    def _initialize_private_config(self):
+    async def _initialize_private_config(self):
         """如果是从配置文件获取，则进行二次实例化"""
         if not self.read_config_from_api:
             return
         """从接口获取差异化的配置进行二次实例化，非全量重新实例化"""
         try:
             begin_time = time.time()
-            private_config = get_private_config_from_api(
+            private_config = await get_private_config_from_api(
                 self.config,
                 self.headers.get("device-id"),
                 self.headers.get("client-id", self.headers.get("device-id")),
@@ -457,7 +486,9 @@ class ConnectionHandler:
         if private_config.get("chat_history_conf", None) is not None:
             self.chat_history_conf = int(private_config["chat_history_conf"])
         try:
-            modules = initialize_modules(
+            # 实例化provider可能涉及网络和文件IO，放到共享执行器中执行
+            modules = await run_blocking(
+                initialize_modules,
                 self.logger,
                 private_config,
                 init_vad,
@@ -466,6 +497,7 @@ class ConnectionHandler:
                 init_tts,
                 init_memory,
                 init_intent,
+                executor=self.executor,
             )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"初始化组件失败: {e}")
@@ -508,13 +540,17 @@ class ConnectionHandler:
                 "llm"
             ]
             if memory_llm_name and memory_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
+                # 如果配置了专用LLM，则从共享池获取独立的LLM实例
                 from core.utils import llm as llm_utils
 
-                memory_llm_config = self.config["LLM"][memory_llm_name]
+                memory_llm_config = to_plain_dict(self.config["LLM"][memory_llm_name])
                 memory_llm_type = memory_llm_config.get("type", memory_llm_name)
-                memory_llm = llm_utils.create_instance(
-                    memory_llm_type, memory_llm_config
+                memory_llm = get_shared_provider(
+                    "LLM",
+                    memory_llm_type,
+                    llm_utils.create_instance,
+                    memory_llm_config,
+                    shareable=lambda instance: instance.shareable,
                 )
                 self.logger.bind(tag=TAG).info(
                     f"为记忆总结创建了专用LLM: {memory_llm_name}, 类型: {memory_llm_type}"
@@ -550,13 +586,17 @@ class ConnectionHandler:
             ]
 
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
+                # 如果配置了专用LLM，则从共享池获取独立的LLM实例
                 from core.utils import llm as llm_utils
 
-                intent_llm_config = self.config["LLM"][intent_llm_name]
+                intent_llm_config = to_plain_dict(self.config["LLM"][intent_llm_name])
                 intent_llm_type = intent_llm_config.get("type", intent_llm_name)
-                intent_llm = llm_utils.create_instance(
-                    intent_llm_type, intent_llm_config
+                intent_llm = get_shared_provider(
+                    "LLM",
+                    intent_llm_type,
+                    llm_utils.create_instance,
+                    intent_llm_config,
+                    shareable=lambda instance: instance.shareable,
                 )
                 self.logger.bind(tag=TAG).info(
                     f"为意图识别创建了专用LLM: {intent_llm_name}, 类型: {intent_llm_type}"
@@ -855,31 +895,27 @@ class ConnectionHandler:
         else:
             pass
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                type, text, audio_data, report_time = item
+    async def _report_worker(self):
+        """聊天记录上报任务，上报请求在共享执行器中按顺序执行"""
+        try:
+            while not self.stop_event.is_set():
                 try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(
-                        self._process_report, type, text, audio_data, report_time
+                    item = await self.report_queue.get()
+                    if item is None:  # 检测毒丸对象
+                        break
+                    type, text, audio_data, report_time = item
+                    await run_blocking(
+                        self._process_report,
+                        type,
+                        text,
+                        audio_data,
+                        report_time,
+                        executor=self.executor,
                     )
                 except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
+                    self.logger.bind(tag=TAG).error(f"聊天记录上报任务异常: {e}")
+        finally:
+            self.logger.bind(tag=TAG).info("聊天记录上报任务已退出")
 
     def _process_report(self, type, text, audio_data, report_time):
         """处理上报任务"""
@@ -888,9 +924,6 @@ class ConnectionHandler:
             report(self, type, text, audio_data, report_time)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
 
     def clearSpeakStatus(self):
         self.client_is_speaking = False
@@ -899,11 +932,6 @@ class ConnectionHandler:
     async def close(self, ws=None):
         """资源清理方法"""
         try:
-            # 取消超时任务
-            if self.timeout_task:
-                self.timeout_task.cancel()
-                self.timeout_task = None
-
             # 清理MCP资源
             if hasattr(self, "mcp_manager") and self.mcp_manager:
                 await self.mcp_manager.cleanup_all()
@@ -912,6 +940,15 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+            # 取消ASR、TTS和上报任务
+            if self.report_task:
+                self.report_task.cancel()
+                self.report_task = None
+            if self.asr:
+                await self.asr.close_audio_channels(self)
+            if self.tts:
+                await self.tts.close_audio_channels()
+
             # 清空任务队列
             self.clear_queues()
 
@@ -921,10 +958,13 @@ class ConnectionHandler:
             elif self.websocket:
                 await self.websocket.close()
 
-            # 最后关闭线程池（避免阻塞）
+            # 最后取消该连接在共享线程池中尚未执行的任务
             if self.executor:
-                self.executor.shutdown(wait=False)
+                self.executor.shutdown(wait=False, cancel_futures=True)
                 self.executor = None
+            if self.chat_executor:
+                self.chat_executor.shutdown(wait=False, cancel_futures=True)
+                self.chat_executor = None
 
             self.logger.bind(tag=TAG).info("连接资源已释放")
         except Exception as e:
@@ -943,23 +983,22 @@ class ConnectionHandler:
                 self.tts.tts_audio_queue,
                 self.report_queue,
             ]:
-                if not q:
-                    continue
-                while True:
-                    try:
-                        q.get_nowait()
-                    except queue.Empty:
-                        break
+                if q:
+                    q.clear()
+            # 取消还在合成中的后续句子
+            self.tts.cancel_synthesis()
 
             self.logger.bind(tag=TAG).debug(
                 f"清理结束: TTS队列大小={self.tts.tts_text_queue.qsize()}, 音频队列大小={self.tts.tts_audio_queue.qsize()}"
             )
 
     def reset_vad_states(self):
-        self.client_audio_buffer = bytearray()
+        if self.vad_session:
+            self.vad_session.reset()
         self.client_have_voice = False
         self.client_have_voice_last_time = 0
         self.client_voice_stop = False
+        self.client_silence_ms = 0.0
         self.logger.bind(tag=TAG).debug("VAD states reset.")
 
     def chat_and_close(self, text):
@@ -972,15 +1011,3 @@ class ConnectionHandler:
             self.close_after_chat = True
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"Chat and close error: {str(e)}")
-
-    async def _check_timeout(self):
-        """检查连接超时"""
-        try:
-            while not self.stop_event.is_set():
-                await asyncio.sleep(self.timeout_seconds)
-                if not self.stop_event.is_set():
-                    self.logger.bind(tag=TAG).info("连接超时，准备关闭")
-                    await self.close(self.websocket)
-                    break
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"超时检查任务出错: {e}")
@@ -13,6 +13,7 @@ from core.handle.mcpHandle import (
     send_mcp_tools_list_request,
 )
 from core.utils.wakeup_word import WakeupWordsConfig
+from core.utils.executor import run_blocking
 
 TAG = __name__
 
@@ -35,6 +36,7 @@ async def handleHelloMessage(conn, msg_json):
         format = audio_params.get("format")
         conn.logger.bind(tag=TAG).info(f"客户端音频格式: {format}")
         conn.audio_format = format
+        conn.uplink_audio.audio_format = format
         conn.welcome_msg["audio_params"] = audio_params
     features = msg_json.get("features")
     if features:
@@ -108,12 +110,19 @@ async def wakeupWordsResponse(conn):
             + "请勿对这条内容本身进行任何解释和回应，请勿返回表情符号，仅返回对用户的内容的回复。"
         )
 
-        result = conn.llm.response_no_stream(conn.config["prompt"], question)
+        result = await run_blocking(
+            conn.llm.response_no_stream,
+            conn.config["prompt"],
+            question,
+            executor=conn.executor,
+        )
         if not result or len(result) == 0:
             return
 
         # 生成TTS音频
-        tts_result = await asyncio.to_thread(conn.tts.to_tts, result)
+        tts_result = await run_blocking(
+            conn.tts.to_tts, result, executor=conn.executor
+        )
         if not tts_result:
             return
 
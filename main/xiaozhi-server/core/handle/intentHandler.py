@@ -1,5 +1,6 @@
 import json
 import uuid
+import asyncio
 from core.handle.sendAudioHandle import send_stt_message
 from core.handle.helloHandle import checkWakeupWords
 from core.utils.util import remove_punctuation_and_length
@@ -53,6 +54,13 @@ async def analyze_intent_with_llm(conn, text):
     # 对话历史记录
     dialogue = conn.dialogue
     try:
+        # 临时端点上已经对相同文本提前开始了意图识别，直接复用其结果
+        speculative = conn.speculative_intent
+        conn.speculative_intent = None
+        if speculative and speculative[0] == text:
+            return await speculative[1]
+        if speculative:
+            speculative[1].cancel()
         intent_result = await conn.intent.detect_intent(conn, dialogue.dialogue, text)
         return intent_result
     except Exception as e:
@@ -61,6 +69,24 @@ async def analyze_intent_with_llm(conn, text):
     return None
 
 
+def prestart_intent(conn, text):
+    """推测识别得到临时文本后提前开始意图识别，最终文本相同时可以直接使用结果"""
+    if conn.intent_type != "intent_llm" or not conn.intent:
+        return
+    discard_speculative_intent(conn)
+    task = asyncio.create_task(
+        conn.intent.detect_intent(conn, conn.dialogue.dialogue, text)
+    )
+    conn.speculative_intent = (text, task)
+
+
+def discard_speculative_intent(conn):
+    speculative = conn.speculative_intent
+    conn.speculative_intent = None
+    if speculative:
+        speculative[1].cancel()
+
+
 async def process_intent_result(conn, intent_result, original_text):
     """处理意图识别结果"""
     try:
@@ -134,8 +160,8 @@ async def process_intent_result(conn, intent_result, original_text):
                         if text is not None:
                             speak_txt(conn, text)
 
-            # 将函数执行放在线程池中
-            conn.executor.submit(process_function_call)
+            # 函数执行后可能还要请求大模型，放在对话线程池中
+            conn.chat_executor.submit(process_function_call)
             return True
         return False
     except json.JSONDecodeError as e:
@@ -11,8 +11,10 @@ TAG = __name__
 
 
 async def handleAudioMessage(conn, audio):
+    # 解码为PCM，后续VAD和ASR都使用同一份PCM
+    pcm_frame = conn.uplink_audio.decode(audio)
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad(conn, pcm_frame)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if have_voice and hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -28,7 +30,7 @@ async def handleAudioMessage(conn, audio):
     # 设备长时间空闲检测，用于say goodbye
     await no_voice_close_connect(conn, have_voice)
     # 接收音频
-    await conn.asr.receive_audio(conn, audio, have_voice)
+    await conn.asr.receive_audio(conn, pcm_frame, have_voice)
 
 
 async def resume_vad_detection(conn):
@@ -61,7 +63,7 @@ async def startToChat(conn, text):
 
     # 意图未被处理，继续常规聊天流程
     await send_stt_message(conn, text)
-    conn.executor.submit(conn.chat, text)
+    conn.chat_executor.submit(conn.chat, text)
 
 
 async def no_voice_close_connect(conn, have_voice):
@@ -18,28 +18,30 @@ from config.manage_api_client import report as manage_report
 TAG = __name__
 
 
-def report(conn, type, text, opus_data, report_time):
+def report(conn, type, text, audio_data, report_time):
     """执行聊天记录上报操作
 
     Args:
         conn: 连接对象
         type: 上报类型，1为用户，2为智能体
         text: 合成文本
-        opus_data: opus音频数据
+        audio_data: 音频数据，用户语音为上行阶段已解码的PCM帧，智能体语音为opus数据
         report_time: 上报时间
     """
     try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
+        if audio_data and type == 1:
+            wav_data = pcm_to_wav(audio_data)
+        elif audio_data:
+            wav_data = opus_to_wav(conn, audio_data)
         else:
-            audio_data = None
+            wav_data = None
         # 执行上报
         manage_report(
             mac_address=conn.device_id,
             session_id=conn.session_id,
             chat_type=type,
             content=text,
-            audio=audio_data,
+            audio=wav_data,
             report_time=report_time,
         )
     except Exception as e:
@@ -51,7 +53,7 @@ def opus_to_wav(conn, opus_data):
 
     Args:
         output_dir: 输出目录（保留参数以保持接口兼容）
-        opus_data: opus音频数据
+        opus_data: opus音频数据，list of bytes或OpusFrames
 
     Returns:
         bytes: WAV格式的音频数据
@@ -61,16 +63,28 @@ def opus_to_wav(conn, opus_data):
 
     for opus_packet in opus_data:
         try:
-            pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
+            pcm_frame = decoder.decode(bytes(opus_packet), 960)  # 960 samples = 60ms
             pcm_data.append(pcm_frame)
         except opuslib_next.OpusError as e:
             conn.logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
 
-    if not pcm_data:
+    return pcm_to_wav(pcm_data)
+
+
+def pcm_to_wav(pcm_data):
+    """将16kHz单声道PCM帧转换为WAV格式的字节流
+
+    Args:
+        pcm_data: PCM帧列表
+
+    Returns:
+        bytes: WAV格式的音频数据
+    """
+    pcm_data_bytes = b"".join(pcm_data)
+    if not pcm_data_bytes:
         raise ValueError("没有有效的PCM数据")
 
     # 创建WAV文件头
-    pcm_data_bytes = b"".join(pcm_data)
     num_samples = len(pcm_data_bytes) // 2  # 16-bit samples
 
     # WAV文件头
@@ -121,7 +135,7 @@ def enqueue_tts_report(conn, text, opus_data):
         conn.logger.bind(tag=TAG).error(f"加入TTS上报队列失败: {text}, {e}")
 
 
-def enqueue_asr_report(conn, text, opus_data):
+def enqueue_asr_report(conn, text, pcm_data):
     if not conn.read_config_from_api or conn.need_bind or not conn.report_asr_enable:
         return
     if conn.chat_history_conf == 0:
@@ -130,15 +144,15 @@ def enqueue_asr_report(conn, text, opus_data):
 
     Args:
         conn: 连接对象
-        text: 合成文本
-        opus_data: opus音频数据
+        text: 识别文本
+        pcm_data: 上行阶段已解码的PCM帧
     """
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            conn.report_queue.put((1, text, pcm_data, int(time.time())))
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
+                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(pcm_data) if pcm_data else 0} "
             )
         else:
             conn.report_queue.put((1, text, None, int(time.time())))
@@ -1,7 +1,7 @@
 import json
 import asyncio
 import time
-from core.providers.tts.dto.dto import SentenceType
+from core.providers.tts.dto.dto import SentenceType, StreamedAudio
 from core.utils.util import get_string_no_punctuation_or_emoji, analyze_emotion
 from loguru import logger
 
@@ -56,7 +56,15 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
 
     await send_tts_message(conn, "sentence_start", text)
 
-    await sendAudio(conn, audios, pre_buffer)
+    if isinstance(audios, StreamedAudio):
+        # 流式合成的句子，每收到一块音频就发送，整句只有一对开始/结束消息
+        async for audio_datas in audios.chunks():
+            if conn.client_abort:
+                continue
+            await sendAudio(conn, audio_datas, pre_buffer)
+            pre_buffer = False
+    else:
+        await sendAudio(conn, audios, pre_buffer)
 
     await send_tts_message(conn, "sentence_end", text)
 
@@ -68,7 +76,7 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
             await conn.close()
 
 
-# 播放音频
+# 播放音频，audios可以是list of bytes或OpusFrames，帧直接以memoryview发送
 async def sendAudio(conn, audios, pre_buffer=True):
     if audios is None or len(audios) == 0:
         return
@@ -94,7 +102,7 @@ async def sendAudio(conn, audios, pre_buffer=True):
 
         # 每分钟重置一次计时器
         if time.perf_counter() - last_reset_time > 60:
-            await conn.reset_timeout()
+            conn.reset_timeout()
             last_reset_time = time.perf_counter()
 
         # 计算预期发送时间
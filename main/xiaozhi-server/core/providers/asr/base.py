@@ -1,11 +1,9 @@
 import os
+import time
 import wave
-import copy
 import uuid
-import queue
 import asyncio
 import traceback
-import threading
 import opuslib_next
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
@@ -14,10 +12,72 @@ from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
 from core.handle.receiveAudioHandle import handleAudioMessage
+from core.handle.intentHandler import prestart_intent, discard_speculative_intent
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils.executor import run_blocking
+from core.utils.inference import run_inference, is_process_pool
+from core.utils.stats import register_stats
 
 TAG = __name__
 logger = setup_logging()
 
+# Default provisional silence for speculative recognition
+DEFAULT_PROVISIONAL_SILENCE_MS = 300
+
+
+class SpeculativeRecognition:
+    """Recognition started early at a provisional endpoint
+
+    The result is committed if silence lasts until the real endpoint, and
+    discarded if the user starts speaking again before that.
+    """
+
+    # Counters shared by all connections in this process
+    started = 0
+    committed = 0
+    discarded = 0
+    total_saved_ms = 0.0
+
+    def __init__(self, coro):
+        self.start_time = time.monotonic()
+        self.finish_time = None
+        self.task = asyncio.ensure_future(coro)
+        self.task.add_done_callback(self._on_done)
+        SpeculativeRecognition.started += 1
+
+    def _on_done(self, task):
+        self.finish_time = time.monotonic()
+
+    async def commit(self) -> str:
+        """Wait for the result and record how much latency was saved"""
+        stop_time = time.monotonic()
+        text = await self.task
+        duration = self.finish_time - self.start_time
+        # Without speculation the recognition would have started at stop_time
+        saved_ms = (duration - max(0.0, self.finish_time - stop_time)) * 1000
+        SpeculativeRecognition.committed += 1
+        SpeculativeRecognition.total_saved_ms += saved_ms
+        logger.bind(tag=TAG).info(f"Speculative ASR committed, saved {saved_ms:.0f}ms")
+        return text
+
+    def discard(self):
+        self.task.cancel()
+        SpeculativeRecognition.discarded += 1
+
+    @classmethod
+    def get_stats(cls):
+        return {
+            "started": cls.started,
+            "committed": cls.committed,
+            "discarded": cls.discarded,
+            "avg_saved_ms": (
+                cls.total_saved_ms / cls.committed if cls.committed else 0.0
+            ),
+        }
+
+
+register_stats("speculative_asr", SpeculativeRecognition.get_stats)
+
 
 class ASRProviderBase(ABC):
     def __init__(self):
@@ -27,24 +87,24 @@ class ASRProviderBase(ABC):
     # Default non-streaming processing method
     # Override in subclass for streaming processing
     async def open_audio_channels(self, conn):
-        # ASR processing thread
-        conn.asr_priority_thread = threading.Thread(
-            target=self.asr_text_priority_thread, args=(conn,), daemon=True
+        # ASR processing task
+        conn.asr_priority_task = asyncio.create_task(
+            self.asr_text_priority_task(conn)
         )
-        conn.asr_priority_thread.start()
+
+    async def close_audio_channels(self, conn):
+        task = getattr(conn, "asr_priority_task", None)
+        if task:
+            task.cancel()
+            conn.asr_priority_task = None
+        self.discard_speculation(conn)
 
     # Process ASR audio in order
-    def asr_text_priority_thread(self, conn):
+    async def asr_text_priority_task(self, conn):
         while not conn.stop_event.is_set():
             try:
-                message = conn.asr_audio_queue.get(timeout=1)
-                future = asyncio.run_coroutine_threadsafe(
-                    handleAudioMessage(conn, message),
-                    conn.loop,
-                )
-                future.result()
-            except queue.Empty:
-                continue
+                message = await conn.asr_audio_queue.get()
+                await handleAudioMessage(conn, message)
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"Failed to process ASR text: {str(e)}, Type: {type(e).__name__}, Stack: {traceback.format_exc()}"
@@ -54,32 +114,84 @@ class ASRProviderBase(ABC):
     # Receive audio
     # Default non-streaming processing method
     # Override in subclass for streaming processing
+    # audio is one 16kHz mono PCM frame already decoded by conn.uplink_audio
     async def receive_audio(self, conn, audio, audio_have_voice):
         if conn.client_listen_mode == "auto" or conn.client_listen_mode == "realtime":
             have_voice = audio_have_voice
         else:
             have_voice = conn.client_have_voice
-        # Discard audio if no voice detected in current and previous segment
-        conn.asr_audio.append(audio)
+        # No voice in current and previous segment, only keep it as pre-roll
         if have_voice == False and conn.client_have_voice == False:
-            conn.asr_audio = conn.asr_audio[-10:]
+            conn.asr_audio.append_preroll(audio)
             return
+        conn.asr_audio.append(audio)
 
         # If current segment has voice and has stopped
         if conn.client_voice_stop:
-            asr_audio_task = copy.deepcopy(conn.asr_audio)
-            conn.asr_audio.clear()
+            asr_audio_task = conn.asr_audio.take()
 
             # Audio too short to recognize
             conn.reset_vad_states()
             if len(asr_audio_task) > 15:
                 await self.handle_voice_stop(conn, asr_audio_task)
+            else:
+                self.discard_speculation(conn)
+        elif conn.client_listen_mode != "manual":
+            self.update_speculation(conn, audio_have_voice)
+
+    def update_speculation(self, conn, audio_have_voice):
+        """Start recognition at a provisional endpoint, drop it if speech resumes"""
+        if audio_have_voice:
+            self.discard_speculation(conn)
+            return
+        if conn.asr_speculation is not None or conn.client_silence_ms <= 0:
+            return
+        speculative_config = conn.config.get("speculative_asr") or {}
+        if not speculative_config.get("enable", False):
+            return
+        provisional_ms = float(
+            speculative_config.get("provisional_silence_ms")
+            or DEFAULT_PROVISIONAL_SILENCE_MS
+        )
+        if conn.client_silence_ms < provisional_ms or len(conn.asr_audio) <= 15:
+            return
+        conn.asr_speculation = SpeculativeRecognition(
+            self._speculate(
+                conn,
+                list(conn.asr_audio),
+                speculative_config.get("prestart_intent", True),
+            )
+        )
+
+    async def _speculate(self, conn, asr_audio, start_intent):
+        raw_text, _ = await self.speech_to_text(asr_audio, conn.session_id, "pcm")
+        if start_intent and remove_punctuation_and_length(raw_text)[0] > 0:
+            prestart_intent(conn, raw_text)
+        return raw_text
+
+    def discard_speculation(self, conn):
+        speculation = getattr(conn, "asr_speculation", None)
+        if speculation is not None:
+            conn.asr_speculation = None
+            speculation.discard()
+            discard_speculative_intent(conn)
 
     # Handle voice stop event
     async def handle_voice_stop(self, conn, asr_audio_task):
-        raw_text, _ = await self.speech_to_text(
-            asr_audio_task, conn.session_id, conn.audio_format
-        )  # Ensure ASR module returns raw text
+        raw_text = None
+        speculation = conn.asr_speculation
+        conn.asr_speculation = None
+        if speculation is not None:
+            # Silence held since the provisional endpoint, reuse its result
+            try:
+                raw_text = await speculation.commit()
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"Speculative ASR failed, retrying: {e}")
+        if raw_text is None:
+            # Uplink audio has already been decoded to PCM frames
+            raw_text, _ = await self.speech_to_text(
+                asr_audio_task, conn.session_id, "pcm"
+            )  # Ensure ASR module returns raw text
         conn.logger.bind(tag=TAG).info(f"Recognized text: {raw_text}")
         text_len, _ = remove_punctuation_and_length(raw_text)
         self.stop_ws_connection()
@@ -91,18 +203,40 @@ class ASRProviderBase(ABC):
     def stop_ws_connection(self):
         pass
 
-    def save_audio_to_file(self, pcm_data: List[bytes], session_id: str) -> str:
-        """Save PCM data to WAV file"""
+    def _audio_file_path(self, session_id: str) -> str:
         module_name = __name__.split(".")[-1]
         file_name = f"asr_{module_name}_{session_id}_{uuid.uuid4()}.wav"
-        file_path = os.path.join(self.output_dir, file_name)
+        return os.path.join(self.output_dir, file_name)
 
+    @staticmethod
+    def _write_wav(file_path: str, pcm_data: List[bytes]):
         with wave.open(file_path, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)  # 2 bytes = 16-bit
             wf.setframerate(16000)
             wf.writeframes(b"".join(pcm_data))
 
+    def save_audio_to_file(self, pcm_data: List[bytes], session_id: str) -> str:
+        """Save PCM data to WAV file"""
+        file_path = self._audio_file_path(session_id)
+        self._write_wav(file_path, pcm_data)
+        return file_path
+
+    def save_audio_in_background(self, pcm_data: List[bytes], session_id: str) -> str:
+        """Save PCM data to WAV file in the task executor, off the recognition path
+
+        Returns the file path immediately; the file appears once the write finishes
+        """
+        file_path = self._audio_file_path(session_id)
+
+        def on_done(task):
+            if not task.cancelled() and task.exception() is not None:
+                logger.bind(tag=TAG).error(
+                    f"Failed to save audio file {file_path}: {task.exception()}"
+                )
+
+        task = asyncio.ensure_future(run_blocking(self._write_wav, file_path, pcm_data))
+        task.add_done_callback(on_done)
         return file_path
 
     @abstractmethod
@@ -114,7 +248,7 @@ class ASRProviderBase(ABC):
 
     @staticmethod
     def decode_opus(opus_data: List[bytes]) -> bytes:
-        """Decode Opus audio data to PCM data"""
+        """Decode Opus audio data (list of packets or OpusFrames) to PCM data"""
         try:
             decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, mono
             pcm_data = []
@@ -123,7 +257,7 @@ class ASRProviderBase(ABC):
             for opus_packet in opus_data:
                 try:
                     # Process with smaller buffer size
-                    pcm_frame = decoder.decode(opus_packet, buffer_size)
+                    pcm_frame = decoder.decode(bytes(opus_packet), buffer_size)
                     if pcm_frame:
                         pcm_data.append(pcm_frame)
                 except opuslib_next.OpusError as e:
@@ -137,3 +271,111 @@ class ASRProviderBase(ABC):
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error during audio decoding: {e}", exc_info=True)
             return []
+
+
+class LocalStreamASRProviderBase(ASRProviderBase):
+    """Base class for local streaming ASR models
+
+    The recognizer model is loaded once per process and shared through the
+    inference model registry, while each connection gets its own provider
+    instance (InterfaceType.STREAM) holding only the state of the current
+    utterance. PCM is fed to the model while the user is speaking, so when
+    the VAD detects the endpoint only the last chunk is left to decode.
+
+    Subclasses implement create_stream, accept_pcm and finalize_stream; the
+    latter two are blocking and run in the inference executor.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interface_type = InterfaceType.STREAM
+        self.stream = None
+        self.text = ""
+        self.partial_text = ""
+
+    @abstractmethod
+    def create_stream(self):
+        """Create the recognition state for a new utterance"""
+        pass
+
+    @abstractmethod
+    def accept_pcm(self, stream, pcm: bytes) -> str:
+        """Feed 16kHz mono PCM and return the partial result so far"""
+        pass
+
+    @abstractmethod
+    def finalize_stream(self, stream) -> str:
+        """Flush the remaining audio and return the final result"""
+        pass
+
+    async def _run_stream(self, conn, func, *args):
+        # Stream state cannot leave this process, so in process-pool mode
+        # the connection's task executor is used instead
+        if is_process_pool():
+            return await run_blocking(func, *args, executor=conn.executor)
+        return await run_inference(func, *args)
+
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        if conn.client_listen_mode == "auto" or conn.client_listen_mode == "realtime":
+            have_voice = audio_have_voice
+        else:
+            have_voice = conn.client_have_voice
+
+        if self.stream is None:
+            if not have_voice:
+                if conn.client_voice_stop:
+                    # Endpoint without any streamed speech, nothing to recognize
+                    conn.reset_vad_states()
+                return
+            # Speech onset: start a new stream with the recent frames as pre-roll
+            pcm_frames = list(conn.uplink_audio.recent)
+            if not pcm_frames or pcm_frames[-1] is not audio:
+                pcm_frames.append(audio)
+            conn.asr_audio.clear()
+            conn.asr_audio.extend(pcm_frames)
+            self.stream = self.create_stream()
+            self.partial_text = ""
+            pcm = b"".join(pcm_frames)
+        else:
+            conn.asr_audio.append(audio)
+            pcm = audio
+
+        try:
+            if pcm:
+                partial_text = await self._run_stream(
+                    conn, self.accept_pcm, self.stream, pcm
+                )
+                if partial_text != self.partial_text:
+                    self.partial_text = partial_text
+                    logger.bind(tag=TAG).debug(f"Partial result: {partial_text}")
+
+            if conn.client_voice_stop:
+                stream, self.stream = self.stream, None
+                start_time = time.time()
+                self.text = await self._run_stream(conn, self.finalize_stream, stream)
+                logger.bind(tag=TAG).debug(
+                    f"Finalize time: {time.time() - start_time:.3f}s | Result: {self.text}"
+                )
+                asr_audio_task = conn.asr_audio.take()
+                conn.reset_vad_states()
+                if len(asr_audio_task) > 15:
+                    await self.handle_voice_stop(conn, asr_audio_task)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Streaming recognition failed: {e}", exc_info=True)
+            self.stream = None
+            conn.asr_audio.clear()
+            conn.reset_vad_states()
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        result = self.text
+        self.text = ""
+        return result, None
+
+    def stop_ws_connection(self):
+        self.stream = None
+
+    async def close_audio_channels(self, conn):
+        self.stream = None
+        await super().close_audio_channels(conn)
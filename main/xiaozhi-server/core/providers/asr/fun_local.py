@@ -2,7 +2,9 @@ import time
 import os
 import sys
 import io
+import asyncio
 import psutil
+import threading
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.base import ASRProviderBase
@@ -10,6 +12,13 @@ from funasr import AutoModel
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 import shutil
 from core.providers.asr.dto.dto import InterfaceType
+from core.utils.inference import (
+    BatchScheduler,
+    register_model,
+    get_model,
+    is_process_pool,
+)
+from core.utils.stats import register_stats
 
 TAG = __name__
 logger = setup_logging()
@@ -17,6 +26,9 @@ logger = setup_logging()
 MAX_RETRIES = 2
 RETRY_DELAY = 1  # 重试延迟（秒）
 
+# AutoModel.generate不保证可重入，同一进程内共享的模型需要串行推理
+_generate_lock = threading.Lock()
+
 
 # 捕获标准输出
 class CaptureOutput:
@@ -35,6 +47,31 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
+def _load_model(model_dir):
+    with CaptureOutput():
+        return AutoModel(
+            model=model_dir,
+            vad_kwargs={"max_single_segment_time": 30000},
+            disable_update=True,
+            hub="hf",
+            # device="cuda:0",  # 启用GPU加速
+        )
+
+
+def _generate_batch(model_dir, pcm_list: List[bytes]) -> List[str]:
+    """在推理执行器中对多个连接的语音一次性批量识别，按输入顺序返回文本"""
+    model = get_model(("fun_local", model_dir), _load_model, model_dir)
+    with _generate_lock:
+        result = model.generate(
+            input=pcm_list,
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size=len(pcm_list),
+        )
+    return [rich_transcription_postprocess(item["text"]) for item in result]
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
@@ -52,14 +89,23 @@ class ASRProvider(ASRProviderBase):
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
-        with CaptureOutput():
-            self.model = AutoModel(
-                model=self.model_dir,
-                vad_kwargs={"max_single_segment_time": 30000},
-                disable_update=True,
-                hub="hf",
-                # device="cuda:0",  # 启用GPU加速
-            )
+        if is_process_pool():
+            # 进程池模式下由各推理子进程按需加载模型，主进程不再重复加载
+            self.model = None
+        else:
+            self.model = _load_model(self.model_dir)
+            register_model(("fun_local", self.model_dir), self.model)
+
+        # 多个连接同时说完时，把它们的语音合并为一次批量识别
+        batch_window_ms = config.get("batch_window_ms", "10")
+        max_batch_size = config.get("max_batch_size", "8")
+        self.scheduler = BatchScheduler(
+            _generate_batch,
+            (self.model_dir,),
+            float(batch_window_ms) if batch_window_ms not in ("", None) else 10,
+            int(max_batch_size) if max_batch_size else 8,
+        )
+        register_stats("asr_batch", self.scheduler.get_stats)
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
@@ -84,22 +130,13 @@ class ASRProvider(ASRProviderBase):
                     if free_space < len(combined_pcm_data) * 2:  # 预留2倍空间
                         raise OSError("磁盘空间不足")
 
-                # 判断是否保存为WAV文件
-                if self.delete_audio_file:
-                    pass
-                else:
-                    file_path = self.save_audio_to_file(pcm_data, session_id)
+                # 需要保留音频时在后台写入WAV文件，不占用识别耗时
+                if not self.delete_audio_file:
+                    file_path = self.save_audio_in_background(pcm_data, session_id)
 
-                # 语音识别
+                # 语音识别，和其他连接的语音合并后在推理执行器中批量执行
                 start_time = time.time()
-                result = self.model.generate(
-                    input=combined_pcm_data,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
-                text = rich_transcription_postprocess(result[0]["text"])
+                text = await self.scheduler.submit(combined_pcm_data)
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
                 )
@@ -116,7 +153,7 @@ class ASRProvider(ASRProviderBase):
                 logger.bind(tag=TAG).warning(
                     f"语音识别失败，正在重试（{retry_count}/{MAX_RETRIES}）: {e}"
                 )
-                time.sleep(RETRY_DELAY)
+                await asyncio.sleep(RETRY_DELAY)
 
             except Exception as e:
                 logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
@@ -0,0 +1,121 @@
+import os
+import sys
+import io
+import psutil
+import threading
+import numpy as np
+from funasr import AutoModel
+from config.logger import setup_logging
+from core.providers.asr.base import LocalStreamASRProviderBase
+from core.utils.inference import get_model
+
+TAG = __name__
+logger = setup_logging()
+
+# 本地目录不存在时从modelscope下载的流式paraformer模型
+DEFAULT_MODEL = "paraformer-zh-streaming"
+# [0, 10, 5] 表示每600ms识别一次，[0, 8, 4] 表示每480ms识别一次
+DEFAULT_CHUNK_SIZE = [0, 10, 5]
+ENCODER_CHUNK_LOOK_BACK = 4
+DECODER_CHUNK_LOOK_BACK = 1
+
+# AutoModel.generate不保证可重入，同一进程内共享的模型需要串行推理
+_generate_lock = threading.Lock()
+
+
+# 捕获标准输出
+class CaptureOutput:
+    def __enter__(self):
+        self._output = io.StringIO()
+        self._original_stdout = sys.stdout
+        sys.stdout = self._output
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sys.stdout = self._original_stdout
+        self.output = self._output.getvalue()
+        self._output.close()
+
+        # 将捕获到的内容通过 logger 输出
+        if self.output:
+            logger.bind(tag=TAG).info(self.output.strip())
+
+
+def _load_model(model):
+    with CaptureOutput():
+        return AutoModel(model=model, disable_update=True)
+
+
+class FunASRStream:
+    """单个连接当前这句话的识别状态"""
+
+    def __init__(self):
+        self.cache = {}
+        self.pcm = bytearray()
+        self.text = ""
+
+
+class ASRProvider(LocalStreamASRProviderBase):
+    """FunASR流式paraformer本地识别，边说边识别
+
+    模型在进程内只加载一份，每个连接只持有自己的识别缓存
+    """
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+
+        # 内存检测，要求大于2G
+        min_mem_bytes = 2 * 1024 * 1024 * 1024
+        total_mem = psutil.virtual_memory().total
+        if total_mem < min_mem_bytes:
+            logger.bind(tag=TAG).error(
+                f"可用内存不足2G，当前仅有 {total_mem / (1024*1024):.2f} MB，可能无法启动FunASR"
+            )
+
+        self.model_dir = config.get("model_dir")
+        chunk_size = config.get("chunk_size") or DEFAULT_CHUNK_SIZE
+        self.chunk_size = [int(size) for size in chunk_size]
+        # 每个识别块的字节数，一帧为60ms即960个采样点
+        self.chunk_bytes = self.chunk_size[1] * 960 * 2
+
+        model = (
+            self.model_dir
+            if self.model_dir and os.path.isdir(self.model_dir)
+            else DEFAULT_MODEL
+        )
+        self.model = get_model(("fun_local_stream", model), _load_model, model)
+
+    def create_stream(self):
+        return FunASRStream()
+
+    def _generate(self, stream, pcm: bytes, is_final: bool) -> str:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+        with _generate_lock:
+            result = self.model.generate(
+                input=samples,
+                cache=stream.cache,
+                is_final=is_final,
+                chunk_size=self.chunk_size,
+                encoder_chunk_look_back=ENCODER_CHUNK_LOOK_BACK,
+                decoder_chunk_look_back=DECODER_CHUNK_LOOK_BACK,
+            )
+        if result:
+            stream.text += result[0]["text"]
+        return stream.text
+
+    def accept_pcm(self, stream, pcm: bytes) -> str:
+        stream.pcm.extend(pcm)
+        offset = 0
+        while len(stream.pcm) - offset >= self.chunk_bytes:
+            self._generate(
+                stream, bytes(stream.pcm[offset : offset + self.chunk_bytes]), False
+            )
+            offset += self.chunk_bytes
+        if offset:
+            del stream.pcm[:offset]
+        return stream.text
+
+    def finalize_stream(self, stream) -> str:
+        # 剩余不足一个识别块的音频补齐静音后作为最后一块
+        pcm = bytes(stream.pcm).ljust(self.chunk_bytes, b"\x00")
+        stream.pcm.clear()
+        return self._generate(stream, pcm, True)
@@ -1,6 +1,12 @@
 from typing import Optional, Tuple, List
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.utils.provider_pool import config_fingerprint
+from core.utils.ws_pool import (
+    get_warm_pool,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_MAX_IDLE_SECONDS,
+)
 import ssl
 import json
 import websockets
@@ -41,6 +47,33 @@ class ASRProvider(ASRProviderBase):
             self.ssl_context.check_hostname = False
             self.ssl_context.verify_mode = ssl.CERT_NONE
 
+        # Sessions are connected ahead of time and shared by all providers
+        # with the same configuration
+        self.warm_pool = get_warm_pool(
+            "fun_server",
+            config_fingerprint("ASR", "fun_server", config),
+            self._open_session,
+            int(config.get("warm_pool_size", DEFAULT_POOL_SIZE)),
+            float(config.get("warm_pool_idle_seconds", DEFAULT_MAX_IDLE_SECONDS)),
+        )
+
+    async def open_audio_channels(self, conn):
+        await super().open_audio_channels(conn)
+        self.warm_pool.warm_up()
+
+    async def _open_session(self):
+        """
+        Open a new authenticated WebSocket session to the FunASR server.
+        """
+        auth_header = {"Authorization": "Bearer; {}".format(self.api_key)}
+        return await websockets.connect(
+            self.uri,
+            additional_headers=auth_header,
+            subprotocols=["binary"],
+            ping_interval=None,
+            ssl=self.ssl_context,
+        )
+
     async def _receive_responses(self, ws) -> None:
         """
         Asynchronous generator to receive messages from the WebSocket.
@@ -120,50 +153,46 @@ class ASRProvider(ASRProviderBase):
             pass
         else:
             file_path = self.save_audio_to_file(pcm_data, session_id)
-        auth_header = {"Authorization": "Bearer; {}".format(self.api_key)}
-        async with websockets.connect(
-            self.uri,
-            additional_headers=auth_header,
-            subprotocols=["binary"],
-            ping_interval=None,
-            ssl=self.ssl_context,
-        ) as ws:
-            try:
-                # Use asyncio to handle WebSocket communication
-                send_task = asyncio.create_task(
-                    self._send_data(ws, combined_pcm_data, session_id)
-                )
-                receive_task = asyncio.create_task(self._receive_responses(ws))
+        # Each session is used once, the pool replaces it in the background
+        ws = await self.warm_pool.acquire()
+        try:
+            # Use asyncio to handle WebSocket communication
+            send_task = asyncio.create_task(
+                self._send_data(ws, combined_pcm_data, session_id)
+            )
+            receive_task = asyncio.create_task(self._receive_responses(ws))
 
-                # Gather tasks with error handling
-                done, pending = await asyncio.wait(
-                    [send_task, receive_task], return_when=asyncio.FIRST_EXCEPTION
-                )
+            # Gather tasks with error handling
+            done, pending = await asyncio.wait(
+                [send_task, receive_task], return_when=asyncio.FIRST_EXCEPTION
+            )
 
-                # Cancel any pending tasks
-                for task in pending:
-                    task.cancel()
-
-                # Check for exceptions in completed tasks
-                for task in done:
-                    if task.exception():
-                        raise task.exception()
-
-                # Get the result from the receive task
-                result = receive_task.result()
-                match = re.match(r"<\|(.*?)\|><\|(.*?)\|><\|(.*?)\|>(.*)", result)
-                if match:
-                    result = match.group(4).strip()
-                return (
-                    result,
-                    file_path,
-                )  # Return the recognized text and timestamp (if any)
+            # Cancel any pending tasks
+            for task in pending:
+                task.cancel()
 
-            except websockets.exceptions.ConnectionClosed as e:
-                logger.bind(tag=TAG).error(f"WebSocket connection closed: {e}")
-                return "", file_path
-            except Exception as e:
-                logger.bind(tag=TAG).error(
-                    f"Error during speech-to-text conversion: {e}", exc_info=True
-                )
-                return "", file_path
+            # Check for exceptions in completed tasks
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+
+            # Get the result from the receive task
+            result = receive_task.result()
+            match = re.match(r"<\|(.*?)\|><\|(.*?)\|><\|(.*?)\|>(.*)", result)
+            if match:
+                result = match.group(4).strip()
+            return (
+                result,
+                file_path,
+            )  # Return the recognized text and timestamp (if any)
+
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.bind(tag=TAG).error(f"WebSocket connection closed: {e}")
+            return "", file_path
+        except Exception as e:
+            logger.bind(tag=TAG).error(
+                f"Error during speech-to-text conversion: {e}", exc_info=True
+            )
+            return "", file_path
+        finally:
+            await ws.close()
@@ -1,5 +1,4 @@
 import time
-import wave
 import os
 import sys
 import io
@@ -7,6 +6,13 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
+from core.utils.inference import (
+    BatchScheduler,
+    register_model,
+    get_model,
+    is_process_pool,
+)
+from core.utils.stats import register_stats
 
 import numpy as np
 import sherpa_onnx
@@ -34,6 +40,34 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
+def _load_model(model_path, tokens_path):
+    with CaptureOutput():
+        return sherpa_onnx.OfflineRecognizer.from_sense_voice(
+            model=model_path,
+            tokens=tokens_path,
+            num_threads=2,
+            sample_rate=16000,
+            feature_dim=80,
+            decoding_method="greedy_search",
+            debug=False,
+            use_itn=True,
+        )
+
+
+def _decode_batch(model_path, tokens_path, inputs: List[Tuple[np.ndarray, int]]) -> List[str]:
+    """在推理执行器中对多个连接的语音一次性批量识别，按输入顺序返回文本"""
+    model = get_model(
+        ("sherpa_onnx_local", model_path), _load_model, model_path, tokens_path
+    )
+    streams = []
+    for samples, sample_rate in inputs:
+        s = model.create_stream()
+        s.accept_waveform(sample_rate, samples)
+        streams.append(s)
+    model.decode_streams(streams)
+    return [s.result.text for s in streams]
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
@@ -72,41 +106,23 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).error(f"模型文件处理失败: {str(e)}")
             raise
 
-        with CaptureOutput():
-            self.model = sherpa_onnx.OfflineRecognizer.from_sense_voice(
-                model=self.model_path,
-                tokens=self.tokens_path,
-                num_threads=2,
-                sample_rate=16000,
-                feature_dim=80,
-                decoding_method="greedy_search",
-                debug=False,
-                use_itn=True,
-            )
-
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
+        if is_process_pool():
+            # 进程池模式下由各推理子进程按需加载模型，主进程不再重复加载
+            self.model = None
+        else:
+            self.model = _load_model(self.model_path, self.tokens_path)
+            register_model(("sherpa_onnx_local", self.model_path), self.model)
+
+        # 多个连接同时说完时，把它们的语音合并为一次批量识别
+        batch_window_ms = config.get("batch_window_ms", "10")
+        max_batch_size = config.get("max_batch_size", "8")
+        self.scheduler = BatchScheduler(
+            _decode_batch,
+            (self.model_path, self.tokens_path),
+            float(batch_window_ms) if batch_window_ms not in ("", None) else 10,
+            int(max_batch_size) if max_batch_size else 8,
+        )
+        register_stats("asr_batch", self.scheduler.get_stats)
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
@@ -114,24 +130,24 @@ class ASRProvider(ASRProviderBase):
         """语音转文本主处理逻辑"""
         file_path = None
         try:
-            # 保存音频文件
-            start_time = time.time()
             if audio_format == "pcm":
                 pcm_data = opus_data
             else:
                 pcm_data = self.decode_opus(opus_data)
-            file_path = self.save_audio_to_file(pcm_data, session_id)
-            logger.bind(tag=TAG).debug(
-                f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
+
+            # 需要保留音频时在后台写入文件，不占用识别耗时
+            if not self.delete_audio_file:
+                file_path = self.save_audio_in_background(pcm_data, session_id)
+
+            # PCM直接在内存中转换为模型需要的float32，不再经过WAV文件中转
+            samples = np.frombuffer(b"".join(pcm_data), dtype=np.int16).astype(
+                np.float32
             )
+            samples *= 1 / 32768
 
-            # 语音识别
+            # 语音识别，和其他连接的语音合并后在推理执行器中批量执行
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            text = await self.scheduler.submit((samples, 16000))
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
@@ -141,11 +157,3 @@ class ASRProvider(ASRProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
             return "", file_path
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
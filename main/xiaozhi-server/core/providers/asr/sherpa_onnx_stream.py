@@ -0,0 +1,104 @@
+import os
+import sys
+import io
+import numpy as np
+import sherpa_onnx
+from config.logger import setup_logging
+from core.providers.asr.base import LocalStreamASRProviderBase
+from core.utils.inference import get_model
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+# 结束时补充的静音时长（秒），让模型输出最后几个字
+TAIL_PADDING_SECONDS = 0.66
+
+
+# 捕获标准输出
+class CaptureOutput:
+    def __enter__(self):
+        self._output = io.StringIO()
+        self._original_stdout = sys.stdout
+        sys.stdout = self._output
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sys.stdout = self._original_stdout
+        self.output = self._output.getvalue()
+        self._output.close()
+
+        # 将捕获到的内容通过 logger 输出
+        if self.output:
+            logger.bind(tag=TAG).info(self.output.strip())
+
+
+def _load_model(encoder, decoder, joiner, tokens, num_threads):
+    with CaptureOutput():
+        return sherpa_onnx.OnlineRecognizer.from_transducer(
+            tokens=tokens,
+            encoder=encoder,
+            decoder=decoder,
+            joiner=joiner,
+            num_threads=num_threads,
+            sample_rate=SAMPLE_RATE,
+            feature_dim=80,
+            decoding_method="greedy_search",
+            # 断句由服务端的VAD负责
+            enable_endpoint_detection=False,
+        )
+
+
+class ASRProvider(LocalStreamASRProviderBase):
+    """sherpa-onnx本地流式识别，边说边识别
+
+    模型在进程内只加载一份，每个连接只持有自己的识别流
+    """
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.model_dir = config.get("model_dir")
+        num_threads = config.get("num_threads", "2")
+        self.num_threads = int(num_threads) if num_threads else 2
+
+        model_files = {
+            "encoder": config.get("encoder") or "encoder-epoch-99-avg-1.onnx",
+            "decoder": config.get("decoder") or "decoder-epoch-99-avg-1.onnx",
+            "joiner": config.get("joiner") or "joiner-epoch-99-avg-1.onnx",
+            "tokens": config.get("tokens") or "tokens.txt",
+        }
+        model_paths = {}
+        for name, file_name in model_files.items():
+            file_path = os.path.join(self.model_dir, file_name)
+            if not os.path.isfile(file_path):
+                logger.bind(tag=TAG).error(f"流式模型文件不存在: {file_path}")
+                raise FileNotFoundError(f"流式模型文件不存在: {file_path}")
+            model_paths[name] = file_path
+
+        self.model = get_model(
+            ("sherpa_onnx_stream", model_paths["encoder"]),
+            _load_model,
+            model_paths["encoder"],
+            model_paths["decoder"],
+            model_paths["joiner"],
+            model_paths["tokens"],
+            self.num_threads,
+        )
+
+    def create_stream(self):
+        return self.model.create_stream()
+
+    def _decode_ready(self, stream) -> str:
+        while self.model.is_ready(stream):
+            self.model.decode_stream(stream)
+        return self.model.get_result(stream)
+
+    def accept_pcm(self, stream, pcm: bytes) -> str:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+        stream.accept_waveform(SAMPLE_RATE, samples)
+        return self._decode_ready(stream)
+
+    def finalize_stream(self, stream) -> str:
+        tail_paddings = np.zeros(int(TAIL_PADDING_SECONDS * SAMPLE_RATE), dtype=np.float32)
+        stream.accept_waveform(SAMPLE_RATE, tail_paddings)
+        stream.input_finished()
+        return self._decode_ready(stream)
@@ -2,6 +2,7 @@ from typing import List, Dict
 from ..base import IntentProviderBase
 from plugins_func.functions.play_music import initialize_music_handler
 from config.logger import setup_logging
+from core.utils.executor import run_blocking
 import re
 import json
 import hashlib
@@ -185,8 +186,12 @@ class IntentProvider(IntentProviderBase):
         llm_start_time = time.time()
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
-        intent = self.llm.response_no_stream(
-            system_prompt=prompt_music, user_prompt=user_prompt
+        # LLM调用是阻塞的，放到执行器中，避免提前识别时卡住连接的事件循环
+        intent = await run_blocking(
+            self.llm.response_no_stream,
+            prompt_music,
+            user_prompt,
+            executor=conn.executor,
         )
 
         # 记录LLM调用完成时间
@@ -5,6 +5,9 @@ TAG = __name__
 logger = setup_logging()
 
 class LLMProviderBase(ABC):
+    # 相同配置的连接是否可以共用一个实例，实例上保存了会话状态的设为False
+    shareable = True
+
     @abstractmethod
     def response(self, session_id, dialogue):
         """LLM response generator"""
@@ -18,6 +18,9 @@ logger = setup_logging()
 
 
 class LLMProvider(LLMProviderBase):
+    # session_conversation_map按会话保存对话id，每个连接使用自己的实例
+    shareable = False
+
     def __init__(self, config):
         self.personal_access_token = config.get("personal_access_token")
         self.bot_id = str(config.get("bot_id"))
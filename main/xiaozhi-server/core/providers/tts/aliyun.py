@@ -6,11 +6,17 @@ import base64
 import requests
 from datetime import datetime
 from core.providers.tts.base import TTSProviderBase
+from core.utils.executor import run_blocking
+from core.utils.http_client import get_async_client
+from config.logger import setup_logging
 
 import time
 import uuid
 from urllib import parse
 
+TAG = __name__
+logger = setup_logging()
+
 
 class AccessToken:
     @staticmethod
@@ -81,6 +87,7 @@ class AccessToken:
 
 
 class TTSProvider(TTSProviderBase):
+    async_text_to_speak = True
 
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
@@ -162,8 +169,9 @@ class TTSProvider(TTSProviderBase):
 
     async def text_to_speak(self, text, output_file):
         if self._is_token_expired():
-            logger.warning("Token已过期，正在自动刷新...")
-            self._refresh_token()
+            logger.bind(tag=TAG).warning("Token已过期，正在自动刷新...")
+            # 获取token是同步请求，放到执行器中执行
+            await run_blocking(self._refresh_token)
         request_json = {
             "appkey": self.appkey,
             "token": self.token,
@@ -178,13 +186,15 @@ class TTSProvider(TTSProviderBase):
 
         # print(self.api_url, json.dumps(request_json, ensure_ascii=False))
         try:
-            resp = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
+            client = get_async_client(self.api_url)
+            resp = await client.post(
+                self.api_url, content=json.dumps(request_json), headers=self.header
             )
             if resp.status_code == 401:  # Token过期特殊处理
-                self._refresh_token()
-                resp = requests.post(
-                    self.api_url, json.dumps(request_json), headers=self.header
+                await run_blocking(self._refresh_token)
+                request_json["token"] = self.token
+                resp = await client.post(
+                    self.api_url, content=json.dumps(request_json), headers=self.header
                 )
             # 检查返回请求数据的mime类型是否是audio/***，是则保存到指定路径下；返回的是binary格式的
             if resp.headers["Content-Type"].startswith("audio/"):
@@ -1,15 +1,21 @@
 import os
-import queue
 import uuid
 import asyncio
-import threading
+from collections import deque
 from core.utils import p3
 from datetime import datetime
 from core.utils import textUtils
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from core.utils.util import audio_to_data, audio_bytes_to_data
+from core.utils.audio_decode import decode_stream
+from core.utils.opus_encoder_utils import OpusEncoderUtils
 from core.utils.tts import MarkdownCleaner
+from core.utils.async_queue import AsyncQueue
+from core.utils.executor import run_blocking
+from core.utils.http_client import close_loop_clients
+from core.utils.provider_pool import config_fingerprint
+from core.utils.tts_cache import get_tts_cache, tts_cache_key
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
@@ -18,6 +24,7 @@ from core.providers.tts.dto.dto import (
     SentenceType,
     ContentType,
     InterfaceType,
+    StreamedAudio,
 )
 
 import traceback
@@ -25,8 +32,23 @@ import traceback
 TAG = __name__
 logger = setup_logging()
 
+# 默认同时合成的句子数量
+DEFAULT_TTS_LOOKAHEAD = 3
+# 发送给设备的音频帧时长（毫秒）及16kHz单声道PCM下每帧的字节数
+FRAME_DURATION = 60
+PCM_FRAME_BYTES = 16000 * FRAME_DURATION // 1000 * 2
+
 
 class TTSProviderBase(ABC):
+    # text_to_speak中没有阻塞调用（使用共享的异步HTTP客户端）时设为True，
+    # 直接在连接的事件循环中执行，不再每句话在线程里新建一个事件循环
+    async_text_to_speak = False
+    # 流式合成时text_to_speak_stream返回的音频格式："pcm"（16位小端）、"wav"，
+    # 或者ffmpeg能解码的格式如"mp3"；pcm需要同时给出采样率和声道数
+    stream_audio_format = "pcm"
+    stream_sample_rate = 16000
+    stream_channels = 1
+
     def __init__(self, config, delete_audio_file):
         self.interface_type = InterfaceType.NON_STREAM
         self.conn = None
@@ -34,8 +56,22 @@ class TTSProviderBase(ABC):
         self.delete_audio_file = delete_audio_file
         self.audio_file_type = "wav"
         self.output_file = config.get("output_dir", "tmp/")
-        self.tts_text_queue = queue.Queue()
-        self.tts_audio_queue = queue.Queue()
+        # 开启后，实现了text_to_speak_stream的TTS边接收音频边编码发送
+        self.streaming = str(config.get("streaming", False)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        # 相同TTS配置的合成结果可以互相复用，音色在合成时单独加入缓存键
+        self.cache_namespace = config_fingerprint("TTS", type(self).__module__, config)
+        self.tts_text_queue = AsyncQueue()
+        self.tts_audio_queue = AsyncQueue()
+        self.pipeline_tasks = []
+        # 提前合成后面的句子，按句子顺序交付给音频队列
+        self.tts_lookahead = DEFAULT_TTS_LOOKAHEAD
+        self.synthesis_queue = None
+        self.synthesis_slots = None
+        self.synthesis_tasks = set()
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
 
@@ -84,7 +120,7 @@ class TTSProviderBase(ABC):
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = asyncio.run(self._text_to_speak_once(text, None))
                     if audio_bytes:
                         audio_datas, _ = audio_bytes_to_data(
                             audio_bytes, file_type=self.audio_file_type, is_opus=True
@@ -111,7 +147,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        asyncio.run(self._text_to_speak_once(text, tmp_file))
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -135,10 +171,68 @@ class TTSProviderBase(ABC):
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
                 return None
 
+    async def _text_to_speak_once(self, text, output_file):
+        """在asyncio.run创建的临时事件循环中合成，结束前关闭这个循环的HTTP客户端"""
+        try:
+            return await self.text_to_speak(text, output_file)
+        finally:
+            await close_loop_clients()
+
+    async def _to_tts_async(self, text):
+        """在当前事件循环中合成语音，音频转码在共享执行器中完成
+
+        Returns:
+            list: 音频帧列表，失败时返回None
+        """
+        text = MarkdownCleaner.clean_markdown(text)
+        for retry in range(5):
+            try:
+                audio_bytes = await self.text_to_speak(text, None)
+            except Exception as e:
+                logger.bind(tag=TAG).warning(
+                    f"语音生成失败{retry + 1}次: {text}，错误: {e}"
+                )
+                continue
+            if not audio_bytes:
+                continue
+            logger.bind(tag=TAG).info(f"语音生成成功: {text}，重试{retry}次")
+            if not self.delete_audio_file and self.output_file:
+                self.conn.executor.submit(self._save_audio_file, audio_bytes)
+            audio_datas, _ = await run_blocking(
+                audio_bytes_to_data,
+                audio_bytes,
+                self.audio_file_type,
+                self.conn.audio_format != "pcm",
+                executor=self.conn.executor,
+            )
+            return audio_datas
+        logger.bind(tag=TAG).error(f"语音生成失败: {text}，请检查网络或服务是否正常")
+        return None
+
+    def _save_audio_file(self, audio_bytes):
+        """不删除音频文件时，保留一份合成结果"""
+        file_path = os.path.join(
+            self.output_file,
+            f"tts-{datetime.now().date()}@{uuid.uuid4().hex}.{self.audio_file_type}",
+        )
+        with open(file_path, "wb") as f:
+            f.write(audio_bytes)
+
     @abstractmethod
     async def text_to_speak(self, text, output_file):
         pass
 
+    async def text_to_speak_stream(self, text):
+        """流式合成，逐块返回stream_audio_format格式的音频数据，支持的TTS在子类中重写"""
+        raise NotImplementedError
+
+    def stream_enabled(self):
+        return (
+            self.streaming
+            and type(self).text_to_speak_stream
+            is not TTSProviderBase.text_to_speak_stream
+        )
+
     def audio_to_pcm_data(self, audio_file_path):
         """音频文件转换为PCM编码"""
         return audio_to_data(audio_file_path, is_opus=False)
@@ -189,26 +283,38 @@ class TTSProviderBase(ABC):
     async def open_audio_channels(self, conn):
         self.conn = conn
         self.tts_timeout = conn.config.get("tts_timeout", 10)
-        # tts 消化线程
-        self.tts_priority_thread = threading.Thread(
-            target=self.tts_text_priority_thread, daemon=True
+        self.tts_text_queue.bind_loop(conn.loop)
+        self.tts_audio_queue.bind_loop(conn.loop)
+        self.tts_lookahead = max(
+            int(conn.config.get("tts_lookahead", DEFAULT_TTS_LOOKAHEAD)), 1
         )
-        self.tts_priority_thread.start()
-
-        # 音频播放 消化线程
-        self.audio_play_priority_thread = threading.Thread(
-            target=self._audio_play_priority_thread, daemon=True
-        )
-        self.audio_play_priority_thread.start()
+        self.synthesis_queue = asyncio.Queue()
+        self.synthesis_slots = asyncio.Semaphore(self.tts_lookahead)
+        self.pipeline_tasks = [
+            # tts 消化任务
+            asyncio.create_task(self.tts_text_priority_task()),
+            # 按顺序交付提前合成的音频
+            asyncio.create_task(self._synthesis_delivery_task()),
+            # 音频播放 消化任务
+            asyncio.create_task(self._audio_play_priority_task()),
+        ]
+
+    async def close_audio_channels(self):
+        """取消文本和音频处理任务并释放资源"""
+        for task in self.pipeline_tasks:
+            task.cancel()
+        self.pipeline_tasks = []
+        self.cancel_synthesis()
+        await self.close()
 
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
-    def tts_text_priority_thread(self):
+    async def tts_text_priority_task(self):
         while not self.conn.stop_event.is_set():
             try:
-                message = self.tts_text_queue.get(timeout=1)
+                message = await self.tts_text_queue.get()
                 if self.conn.client_abort:
-                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
+                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理任务")
                     continue
                 if message.sentence_type == SentenceType.FIRST:
                     # 初始化参数
@@ -221,66 +327,299 @@ class TTSProviderBase(ABC):
                     self.tts_text_buff.append(message.content_detail)
                     segment_text = self._get_segment_text()
                     if segment_text:
-                        if self.delete_audio_file:
-                            audio_datas = self.to_tts(segment_text)
-                            if audio_datas:
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
-                        else:
-                            tts_file = self.to_tts(segment_text)
-                            if tts_file:
-                                audio_datas = self._process_audio_file(tts_file)
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
+                        # 不等待合成结果，继续读取后面的文本
+                        await self._schedule_text_synthesis(
+                            message.sentence_type, segment_text
+                        )
                 elif ContentType.FILE == message.content_type:
-                    self._process_remaining_text()
+                    await self._process_remaining_text()
                     tts_file = message.content_file
                     if tts_file and os.path.exists(tts_file):
-                        audio_datas = self._process_audio_file(tts_file)
-                        self.tts_audio_queue.put(
-                            (message.sentence_type, audio_datas, message.content_detail)
+                        await self._schedule_synthesis(
+                            message.sentence_type,
+                            run_blocking(
+                                self._process_audio_file,
+                                tts_file,
+                                executor=self.conn.executor,
+                            ),
+                            message.content_detail,
+                            allow_empty=True,
                         )
 
                 if message.sentence_type == SentenceType.LAST:
-                    self._process_remaining_text()
-                    self.tts_audio_queue.put(
-                        (message.sentence_type, [], message.content_detail)
+                    await self._process_remaining_text()
+                    await self._schedule_synthesis(
+                        message.sentence_type, None, message.content_detail
                     )
 
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
                 )
                 continue
 
-    def _audio_play_priority_thread(self):
+    async def _audio_play_priority_task(self):
         while not self.conn.stop_event.is_set():
             text = None
             try:
-                try:
-                    sentence_type, audio_datas, text = self.tts_audio_queue.get(
-                        timeout=1
-                    )
-                except queue.Empty:
-                    if self.conn.stop_event.is_set():
-                        break
-                    continue
-                future = asyncio.run_coroutine_threadsafe(
-                    sendAudioMessage(self.conn, sentence_type, audio_datas, text),
-                    self.conn.loop,
-                )
-                future.result()
+                sentence_type, audio_datas, text = await self.tts_audio_queue.get()
+                await sendAudioMessage(self.conn, sentence_type, audio_datas, text)
                 if self.conn.max_output_size > 0 and text:
                     add_device_output(self.conn.headers.get("device-id"), len(text))
+                if isinstance(audio_datas, StreamedAudio):
+                    # 整句发送完时合成任务已经结束，上报本句完整的音频
+                    audio_datas = audio_datas.result()
                 enqueue_tts_report(self.conn, text, audio_datas)
             except Exception as e:
                 logger.bind(tag=TAG).error(
-                    f"audio_play_priority priority_thread: {text} {e}"
+                    f"audio_play_priority priority_task: {text} {e}"
+                )
+
+    async def _schedule_text_synthesis(self, sentence_type, text):
+        """合成一句文本，开启流式合成时边合成边交付"""
+        if self.stream_enabled():
+            channel = asyncio.Queue()
+            await self._schedule_synthesis(
+                sentence_type,
+                self._synthesize_stream(text, channel),
+                text,
+                channel=channel,
+            )
+        else:
+            await self._schedule_synthesis(
+                sentence_type, self._synthesize(text), text
+            )
+
+    async def _schedule_synthesis(
+        self, sentence_type, coro, text, allow_empty=False, channel=None
+    ):
+        """开始一个合成任务并按顺序排队交付，最多同时合成tts_lookahead句
+
+        Args:
+            coro: 返回音频帧的协程，为None时表示不需要合成，直接交付空音频
+            allow_empty: 合成结果为空时是否仍然交付
+            channel: 流式合成时逐块放入音频帧的队列，任务结束后放入None
+        """
+        if coro is None:
+            self.synthesis_queue.put_nowait((sentence_type, None, text, True, None))
+            return
+        await self.synthesis_slots.acquire()
+        if self.conn.client_abort:
+            # 等待期间被打断了，这句话不再合成
+            self.synthesis_slots.release()
+            coro.close()
+            return
+        task = asyncio.create_task(coro)
+        self.synthesis_tasks.add(task)
+        task.add_done_callback(self.synthesis_tasks.discard)
+        if channel is not None:
+            task.add_done_callback(lambda _: channel.put_nowait(None))
+        self.synthesis_queue.put_nowait(
+            (sentence_type, task, text, allow_empty, channel)
+        )
+
+    async def _synthesis_delivery_task(self):
+        """按句子顺序等待合成结果并放入音频队列"""
+        while not self.conn.stop_event.is_set():
+            sentence_type, task, text, allow_empty, channel = (
+                await self.synthesis_queue.get()
+            )
+            if task is None:
+                self.tts_audio_queue.put((sentence_type, [], text))
+                continue
+            try:
+                if channel is not None:
+                    await self._deliver_stream(sentence_type, task, text, channel)
+                # 不直接await任务，避免把任务被取消误认为本协程被取消
+                await asyncio.wait([task])
+            finally:
+                self.synthesis_slots.release()
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                logger.bind(tag=TAG).error(
+                    f"语音合成失败: {text}, {task.exception()}"
                 )
+                continue
+            if channel is not None:
+                continue
+            audio_datas = task.result()
+            if audio_datas or allow_empty:
+                self.tts_audio_queue.put((sentence_type, audio_datas, text))
+
+    async def _deliver_stream(self, sentence_type, task, text, channel):
+        """收到第一块音频后把整句作为流放入音频队列，由播放任务边收边发"""
+        first = await channel.get()
+        if first is None:
+            return
+        self.tts_audio_queue.put(
+            (sentence_type, StreamedAudio(channel, task, first), text)
+        )
+
+    def cancel_synthesis(self):
+        """打断时取消正在合成和等待交付的句子"""
+        if self.synthesis_queue is None:
+            return
+        while not self.synthesis_queue.empty():
+            _, task, _, _, _ = self.synthesis_queue.get_nowait()
+            if task is not None:
+                task.cancel()
+                self.synthesis_slots.release()
+        # 交付任务正在等待的那一句，由交付任务释放名额
+        for task in list(self.synthesis_tasks):
+            task.cancel()
+
+    async def _synthesize(self, text):
+        """在共享执行器中合成语音并转换为音频帧，先查询TTS缓存
+
+        Returns:
+            list: 音频帧列表，失败时返回None
+        """
+        cache_key, audio_datas = await self._lookup_cache(text)
+        if audio_datas is not None:
+            return audio_datas
+        return self._store_cache(cache_key, await self._synthesize_uncached(text))
+
+    async def _lookup_cache(self, text):
+        """查询TTS缓存
+
+        Returns:
+            tuple: (缓存键, 音频帧)，文本不可缓存时缓存键为None，未命中时音频帧为None
+        """
+        cache = get_tts_cache()
+        if not cache.cacheable(text):
+            return None, None
+        cache_key = tts_cache_key(
+            self.cache_namespace,
+            getattr(self, "voice", None),
+            text,
+            self.conn.audio_format,
+        )
+        audio_datas = cache.get_memory(cache_key)
+        if audio_datas is None and cache.disk_dir:
+            audio_datas = await run_blocking(
+                cache.get_disk, cache_key, executor=self.conn.executor
+            )
+        return cache_key, audio_datas
+
+    def _store_cache(self, cache_key, audio_datas):
+        """把合成结果放入TTS缓存，返回之后应使用的音频帧"""
+        if not cache_key or not audio_datas:
+            return audio_datas
+        cache = get_tts_cache()
+        audio_datas = cache.put(cache_key, audio_datas)
+        # 磁盘层保存为p3文件，只保存opus帧
+        if cache.disk_dir and self.conn.audio_format != "pcm":
+            self.conn.executor.submit(cache.save_disk, cache_key, audio_datas)
+        return audio_datas
+
+    async def _synthesize_stream(self, text, channel):
+        """流式合成一句话，音频帧陆续放入channel，由交付任务边收边发
+
+        缓存命中或者流式合成没有产生任何音频时，整句放入channel一次。
+
+        Returns:
+            list: 本句全部音频帧，失败时返回None
+        """
+        cache_key, audio_datas = await self._lookup_cache(text)
+        if audio_datas is None:
+            audio_datas, completed = await self._stream_frames(text, channel)
+            if audio_datas:
+                # 中途断开的音频不完整，不放入缓存
+                if completed:
+                    self._store_cache(cache_key, audio_datas)
+                return audio_datas
+            # 还没有收到任何音频就失败了，退回到非流式合成
+            audio_datas = self._store_cache(
+                cache_key, await self._synthesize_uncached(text)
+            )
+        if audio_datas:
+            channel.put_nowait(audio_datas)
+        return audio_datas
+
+    async def _stream_frames(self, text, channel):
+        """接收流式音频并增量编码，每得到若干帧就放入channel
+
+        Returns:
+            tuple: (已经放入channel的全部音频帧, 是否完整接收了整句音频)
+        """
+        text = MarkdownCleaner.clean_markdown(text)
+        encoder = None
+        if self.conn.audio_format != "pcm":
+            encoder = OpusEncoderUtils(
+                sample_rate=16000, channels=1, frame_size_ms=FRAME_DURATION
+            )
+        pending = b""
+        audio_datas = []
+
+        def frame(pcm, end_of_stream):
+            nonlocal pending
+            if encoder is not None:
+                return encoder.encode_pcm_to_opus(pcm, end_of_stream)
+            pending += pcm
+            usable = len(pending) - len(pending) % PCM_FRAME_BYTES
+            if end_of_stream and usable < len(pending):
+                # 最后一帧不足时补零
+                pending += b"\x00" * (PCM_FRAME_BYTES - len(pending) + usable)
+                usable = len(pending)
+            frames = [
+                pending[i : i + PCM_FRAME_BYTES]
+                for i in range(0, usable, PCM_FRAME_BYTES)
+            ]
+            pending = pending[usable:]
+            return frames
+
+        async def emit(pcm, end_of_stream):
+            if encoder is not None:
+                # opus编码比较耗CPU，放到连接的执行器中，同一句按顺序编码
+                frames = await run_blocking(
+                    frame, pcm, end_of_stream, executor=self.conn.executor
+                )
+            else:
+                frames = frame(pcm, end_of_stream)
+            if frames:
+                audio_datas.extend(frames)
+                channel.put_nowait(frames)
+
+        chunks = decode_stream(
+            self.text_to_speak_stream(text),
+            self.stream_audio_format,
+            self.stream_sample_rate,
+            self.stream_channels,
+            executor=self.conn.executor,
+        )
+        completed = False
+        try:
+            async for pcm in chunks:
+                await emit(pcm, False)
+            await emit(b"", True)
+            completed = True
+            logger.bind(tag=TAG).info(f"流式语音生成成功: {text}")
+        except Exception as e:
+            if audio_datas:
+                # 已经发送了一部分，不能再重新合成，保留已有的音频
+                logger.bind(tag=TAG).error(f"流式语音生成中断: {text}，错误: {e}")
+                await emit(b"", True)
+            else:
+                logger.bind(tag=TAG).warning(
+                    f"流式语音生成失败: {text}，使用非流式合成，错误: {e}"
+                )
+        finally:
+            await chunks.aclose()
+        return audio_datas, completed
+
+    async def _synthesize_uncached(self, text):
+        executor = self.conn.executor
+        if self.async_text_to_speak:
+            return await self._to_tts_async(text)
+        if self.delete_audio_file:
+            return await run_blocking(self.to_tts, text, executor=executor)
+        tts_file = await run_blocking(self.to_tts, text, executor=executor)
+        if tts_file:
+            return await run_blocking(
+                self._process_audio_file, tts_file, executor=executor
+            )
+        return None
 
     async def start_session(self, session_id):
         pass
@@ -367,7 +706,7 @@ class TTSProviderBase(ABC):
         self.before_stop_play_files.clear()
         self.tts_audio_queue.put((SentenceType.LAST, [], None))
 
-    def _process_remaining_text(self):
+    async def _process_remaining_text(self):
         """处理剩余的文本并生成语音
 
         Returns:
@@ -378,18 +717,7 @@ class TTSProviderBase(ABC):
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
-                if self.delete_audio_file:
-                    audio_datas = self.to_tts(segment_text)
-                    if audio_datas:
-                        self.tts_audio_queue.put(
-                            (SentenceType.MIDDLE, audio_datas, segment_text)
-                        )
-                else:
-                    tts_file = self.to_tts(segment_text)
-                    audio_datas = self._process_audio_file(tts_file)
-                    self.tts_audio_queue.put(
-                        (SentenceType.MIDDLE, audio_datas, segment_text)
-                    )
+                await self._schedule_text_synthesis(SentenceType.MIDDLE, segment_text)
                 self.processed_chars += len(full_text)
                 return True
         return False
@@ -41,3 +41,39 @@ class TTSMessageDTO:
         self.content_type = content_type
         self.content_detail = content_detail
         self.content_file = content_file
+
+
+class StreamedAudio:
+    """流式合成中的一句话，播放任务边接收音频帧边发送
+
+    Args:
+        channel: 合成任务逐块放入音频帧的队列，结束时放入None
+        task: 合成任务，结果为本句全部音频帧
+        first: 交付任务已经取出的第一块音频帧
+    """
+
+    def __init__(self, channel, task, first):
+        self.channel = channel
+        self.task = task
+        self.first = first
+
+    async def chunks(self):
+        """按到达顺序返回音频帧块，播放跟不上合成时把已到达的块合并"""
+        audio_datas = self.first
+        while audio_datas is not None:
+            while not self.channel.empty():
+                more = self.channel.get_nowait()
+                if more is None:
+                    self.channel.put_nowait(None)
+                    break
+                audio_datas = list(audio_datas) + list(more)
+            yield audio_datas
+            audio_datas = await self.channel.get()
+
+    def result(self):
+        """合成任务正常结束时返回本句全部音频帧，否则返回None"""
+        if not self.task.done() or self.task.cancelled():
+            return None
+        if self.task.exception() is not None:
+            return None
+        return self.task.result()
@@ -1,5 +1,4 @@
 import base64
-import requests
 import ormsgpack
 from pathlib import Path
 from pydantic import BaseModel, Field, conint, model_validator
@@ -7,6 +6,7 @@ from typing_extensions import Annotated
 from typing import Literal
 from core.utils.util import check_model_key, parse_string_to_list
 from core.providers.tts.base import TTSProviderBase
+from core.utils.http_client import get_async_client
 from config.logger import setup_logging
 
 TAG = __name__
@@ -78,6 +78,7 @@ def read_ref_text(ref_text):
 
 
 class TTSProvider(TTSProviderBase):
+    async_text_to_speak = True
 
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
@@ -129,8 +130,12 @@ class TTSProvider(TTSProviderBase):
         self.use_memory_cache = config.get("use_memory_cache", "on")
         self.seed = int(config.get("seed")) if config.get("seed") else None
         self.api_url = config.get("api_url", "http://127.0.0.1:8080/v1/tts")
+        # 流式返回的音频与response_format一致，pcm格式使用rate和channels
+        self.stream_audio_format = self.format
+        self.stream_sample_rate = self.rate
+        self.stream_channels = self.channels
 
-    async def text_to_speak(self, text, output_file):
+    def _build_request(self, text):
         # Prepare reference data
         byte_audios = [audio_to_bytes(ref_audio) for ref_audio in self.reference_audio]
         ref_texts = [read_ref_text(ref_text) for ref_text in self.reference_text]
@@ -155,16 +160,17 @@ class TTSProvider(TTSProviderBase):
         }
 
         pydantic_data = ServeTTSRequest(**data)
+        return ormsgpack.packb(pydantic_data, option=ormsgpack.OPT_SERIALIZE_PYDANTIC)
 
-        response = requests.post(
-            self.api_url,
-            data=ormsgpack.packb(
-                pydantic_data, option=ormsgpack.OPT_SERIALIZE_PYDANTIC
-            ),
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/msgpack",
-            },
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/msgpack",
+        }
+
+    async def text_to_speak(self, text, output_file):
+        response = await get_async_client(self.api_url).post(
+            self.api_url, content=self._build_request(text), headers=self._headers()
         )
 
         if response.status_code == 200:
@@ -181,3 +187,19 @@ class TTSProvider(TTSProviderBase):
             print(error_msg)
             print(response.json())
             raise Exception(error_msg)
+
+    async def text_to_speak_stream(self, text):
+        client = get_async_client(self.api_url)
+        async with client.stream(
+            "POST",
+            self.api_url,
+            content=self._build_request(text),
+            headers=self._headers(),
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(
+                    f"Request failed with status code {response.status_code}: {response.text}"
+                )
+            async for chunk in response.aiter_bytes():
+                yield chunk
@@ -1,6 +1,6 @@
-import requests
 from config.logger import setup_logging
 from core.providers.tts.base import TTSProviderBase
+from core.utils.http_client import get_async_client
 from core.utils.util import parse_string_to_list
 
 TAG = __name__
@@ -8,6 +8,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    async_text_to_speak = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.url = config.get("url")
@@ -66,9 +68,12 @@ class TTSProvider(TTSProviderBase):
             config.get("aux_ref_audio_paths")
         )
         self.audio_file_type = config.get("format", "wav")
+        # streaming_mode开启时服务端先返回WAV头，之后逐段返回音频数据
+        self.streaming = self.streaming_mode
+        self.stream_audio_format = "wav"
 
-    async def text_to_speak(self, text, output_file):
-        request_json = {
+    def _build_request(self, text):
+        return {
             "text": text,
             "text_lang": self.text_lang,
             "ref_audio_path": self.ref_audio_path,
@@ -90,7 +95,10 @@ class TTSProvider(TTSProviderBase):
             "repetition_penalty": self.repetition_penalty,
         }
 
-        resp = requests.post(self.url, json=request_json)
+    async def text_to_speak(self, text, output_file):
+        resp = await get_async_client(self.url).post(
+            self.url, json=self._build_request(text)
+        )
         if resp.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as file:
@@ -101,3 +109,16 @@ class TTSProvider(TTSProviderBase):
             error_msg = f"GPT_SoVITS_V2 TTS请求失败: {resp.status_code} - {resp.text}"
             logger.bind(tag=TAG).error(error_msg)
             raise Exception(error_msg)
+
+    async def text_to_speak_stream(self, text):
+        client = get_async_client(self.url)
+        async with client.stream(
+            "POST", self.url, json=self._build_request(text)
+        ) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                error_msg = f"GPT_SoVITS_V2 TTS请求失败: {resp.status_code} - {resp.text}"
+                logger.bind(tag=TAG).error(error_msg)
+                raise Exception(error_msg)
+            async for chunk in resp.aiter_bytes():
+                yield chunk
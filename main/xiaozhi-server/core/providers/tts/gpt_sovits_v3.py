@@ -1,6 +1,6 @@
-import requests
 from config.logger import setup_logging
 from core.providers.tts.base import TTSProviderBase
+from core.utils.http_client import get_async_client
 from core.utils.util import parse_string_to_list
 
 TAG = __name__
@@ -8,6 +8,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    async_text_to_speak = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.url = config.get("url")
@@ -51,7 +53,9 @@ class TTSProvider(TTSProviderBase):
             "if_sr": self.if_sr,
         }
 
-        resp = requests.get(self.url, params=request_params)
+        # 与requests一致，值为None的参数不发送
+        request_params = {k: v for k, v in request_params.items() if v is not None}
+        resp = await get_async_client(self.url).get(self.url, params=request_params)
         if resp.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as file:
@@ -1,11 +1,10 @@
-import queue
-import asyncio
 import traceback
 import aiohttp
 import requests
 import time
 from config.logger import setup_logging
 from core.utils.tts import MarkdownCleaner
+from core.utils.executor import run_blocking
 from core.providers.tts.base import TTSProviderBase
 from core.utils import opus_encoder_utils, textUtils
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
@@ -40,11 +39,11 @@ class TTSProvider(TTSProviderBase):
     # linkerai单流式TTS重写父类的方法--开始
     ###################################################################################
 
-    def tts_text_priority_thread(self):
-        """流式文本处理线程"""
+    async def tts_text_priority_task(self):
+        """流式文本处理任务"""
         while not self.conn.stop_event.is_set():
             try:
-                message = self.tts_text_queue.get(timeout=1)
+                message = await self.tts_text_queue.get()
                 if message.sentence_type == SentenceType.FIRST:
                     # 初始化参数
                     self.tts_stop_request = False
@@ -57,7 +56,7 @@ class TTSProvider(TTSProviderBase):
                     self.tts_text_buff.append(message.content_detail)
                     segment_text = self._get_segment_text()
                     if segment_text:
-                        self.to_tts_single_stream(segment_text)
+                        await self.to_tts_single_stream(segment_text)
 
                 elif ContentType.FILE == message.content_type:
                     logger.bind(tag=TAG).info(
@@ -69,16 +68,14 @@ class TTSProvider(TTSProviderBase):
 
                 if message.sentence_type == SentenceType.LAST:
                     # 处理剩余的文本
-                    self._process_remaining_text(True)
+                    await self._process_remaining_text(True)
 
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
                 )
 
-    def _process_remaining_text(self, is_last=False):
+    async def _process_remaining_text(self, is_last=False):
         """处理剩余的文本并生成语音
 
         Returns:
@@ -89,19 +86,23 @@ class TTSProvider(TTSProviderBase):
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
-                self.to_tts_single_stream(segment_text, is_last)
+                await self.to_tts_single_stream(segment_text, is_last)
                 self.processed_chars += len(full_text)
             else:
-                self._process_before_stop_play_files()
+                await run_blocking(
+                    self._process_before_stop_play_files, executor=self.conn.executor
+                )
         else:
-            self._process_before_stop_play_files()
+            await run_blocking(
+                self._process_before_stop_play_files, executor=self.conn.executor
+            )
 
-    def to_tts_single_stream(self, text, is_last=False):
+    async def to_tts_single_stream(self, text, is_last=False):
         try:
             max_repeat_time = 5
             text = MarkdownCleaner.clean_markdown(text)
             try:
-                asyncio.run(self.text_to_speak(text, is_last))
+                await self.text_to_speak(text, is_last)
             except Exception as e:
                 logger.bind(tag=TAG).warning(
                     f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -226,7 +227,10 @@ class TTSProvider(TTSProviderBase):
 
                     # 如果是最后一段，输出音频获取完毕
                     if is_last:
-                        self._process_before_stop_play_files()
+                        await run_blocking(
+                            self._process_before_stop_play_files,
+                            executor=self.conn.executor,
+                        )
 
         except Exception as e:
             logger.error(f"TTS请求异常: {e}")
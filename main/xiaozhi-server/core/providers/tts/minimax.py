@@ -1,13 +1,15 @@
 import os
 import uuid
 import json
-import requests
 from datetime import datetime
 from core.providers.tts.base import TTSProviderBase
+from core.utils.http_client import get_async_client
 from core.utils.util import parse_string_to_list
 
 
 class TTSProvider(TTSProviderBase):
+    async_text_to_speak = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.group_id = config.get("group_id")
@@ -53,6 +55,9 @@ class TTSProvider(TTSProviderBase):
             "Authorization": f"Bearer {self.api_key}",
         }
         self.audio_file_type = defult_audio_setting.get("format", "mp3")
+        # 流式合成时请求pcm格式，收到后直接编码，不需要再解码mp3
+        self.stream_sample_rate = int(self.audio_setting.get("sample_rate", 32000))
+        self.stream_channels = int(self.audio_setting.get("channel", 1))
 
     def generate_filename(self, extension=".mp3"):
         return os.path.join(
@@ -60,23 +65,29 @@ class TTSProvider(TTSProviderBase):
             f"tts-{__name__}{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    def _build_request(self, text, stream):
         request_json = {
             "model": self.model,
             "text": text,
-            "stream": False,
+            "stream": stream,
             "voice_setting": self.voice_setting,
             "pronunciation_dict": self.pronunciation_dict,
             "audio_setting": self.audio_setting,
         }
+        if stream:
+            request_json["audio_setting"] = {**self.audio_setting, "format": "pcm"}
 
         if type(self.timber_weights) is list and len(self.timber_weights) > 0:
             request_json["timber_weights"] = self.timber_weights
             request_json["voice_setting"]["voice_id"] = ""
+        return request_json
+
+    async def text_to_speak(self, text, output_file):
+        request_json = self._build_request(text, False)
 
         try:
-            resp = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
+            resp = await get_async_client(self.api_url).post(
+                self.api_url, content=json.dumps(request_json), headers=self.header
             )
             # 检查返回请求数据的status_code是否为0
             if resp.json()["base_resp"]["status_code"] == 0:
@@ -93,3 +104,29 @@ class TTSProvider(TTSProviderBase):
                 )
         except Exception as e:
             raise Exception(f"{__name__} error: {e}")
+
+    async def text_to_speak_stream(self, text):
+        request_json = self._build_request(text, True)
+        client = get_async_client(self.api_url)
+        async with client.stream(
+            "POST", self.api_url, content=json.dumps(request_json), headers=self.header
+        ) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                raise Exception(
+                    f"{__name__} status_code: {resp.status_code} response: {resp.content}"
+                )
+            # 返回SSE，每个事件的data.audio是一段十六进制编码的音频
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                base_resp = event.get("base_resp") or {}
+                if base_resp.get("status_code", 0) != 0:
+                    raise Exception(f"{__name__} response: {line}")
+                data = event.get("data") or {}
+                # status为2的最后一个事件会重复返回整段音频，跳过
+                if data.get("status") == 2:
+                    break
+                if data.get("audio"):
+                    yield bytes.fromhex(data["audio"])
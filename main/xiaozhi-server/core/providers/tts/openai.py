@@ -1,5 +1,6 @@
 from openai import OpenAI
 from core.utils.util import check_model_key
+from core.utils.http_client import get_async_client
 from core.providers.tts.base import TTSProviderBase
 from config.logger import setup_logging
 
@@ -8,6 +9,9 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    # 流式合成请求pcm格式，OpenAI返回24kHz单声道16位PCM
+    stream_sample_rate = 24000
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.api_key = config.get("api_key")
@@ -20,6 +24,7 @@ class TTSProvider(TTSProviderBase):
         self.speed = float(speed) if speed else 1.0
 
         self.output_dir = config.get("output_dir", "tmp/")
+        self.api_url = config.get("api_url", "https://api.openai.com/v1/audio/speech")
         check_model_key("TTS", self.api_key)
 
         self.client = OpenAI(api_key=self.api_key)
@@ -40,3 +45,25 @@ class TTSProvider(TTSProviderBase):
                 f.write(response.content)
         else:
             return response.content
+
+    async def text_to_speak_stream(self, text):
+        client = get_async_client(self.api_url)
+        async with client.stream(
+            "POST",
+            self.api_url,
+            json={
+                "model": self.model,
+                "voice": self.voice,
+                "input": text,
+                "response_format": "pcm",
+                "speed": self.speed,
+            },
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(
+                    f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
+                )
+            async for chunk in response.aiter_bytes():
+                yield chunk
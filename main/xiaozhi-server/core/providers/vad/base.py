@@ -1,9 +1,209 @@
+import numpy as np
 from abc import ABC, abstractmethod
 from typing import Optional
 
+# 默认的模型输入块大小（16kHz下512采样点）
+DEFAULT_CHUNK_SAMPLES = 512
+# 环形缓冲区初始容量（采样点），可容纳若干个60ms的opus帧
+DEFAULT_BUFFER_SAMPLES = 4096
+# int16 PCM归一化到[-1, 1)的系数
+_INT16_SCALE = np.float32(1.0 / 32768)
+
+
+class PcmRingBuffer:
+    """预分配的int16 PCM环形缓冲区
+
+    写入时只把采样点复制进预分配的数组，读取时一次性取出全部完整的块，
+    在一次向量运算中归一化为float32，结果写入预分配的输出数组并以视图返回，
+    整个过程不再为每个块创建新的bytes/ndarray对象。
+    """
+
+    def __init__(self, chunk_samples=DEFAULT_CHUNK_SAMPLES, capacity=DEFAULT_BUFFER_SAMPLES):
+        self.chunk_samples = chunk_samples
+        capacity = max(int(capacity), chunk_samples)
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._out = np.empty(capacity, dtype=np.float32)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def write(self, pcm: bytes):
+        """追加一段16位PCM"""
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        count = len(samples)
+        if count == 0:
+            return
+        if self._size + count > len(self._buf):
+            self._grow(self._size + count)
+
+        capacity = len(self._buf)
+        end = (self._start + self._size) % capacity
+        first = min(count, capacity - end)
+        self._buf[end : end + first] = samples[:first]
+        if first < count:
+            self._buf[: count - first] = samples[first:]
+        self._size += count
+
+    def read_chunks(self) -> np.ndarray:
+        """取出全部完整的块，返回形状为 (块数, chunk_samples) 的float32视图
+
+        返回的视图指向内部的输出数组，在下一次调用 read_chunks 之前有效
+        """
+        count = self._size // self.chunk_samples
+        samples = count * self.chunk_samples
+        out = self._out[:samples]
+        if count:
+            capacity = len(self._buf)
+            first = min(samples, capacity - self._start)
+            # 先把int16复制转换到输出数组，再原地归一化，避免类型转换产生临时数组
+            out[:first] = self._buf[self._start : self._start + first]
+            if first < samples:
+                out[first:] = self._buf[: samples - first]
+            out *= _INT16_SCALE
+            self._start = (self._start + samples) % capacity
+            self._size -= samples
+        return out.reshape(count, self.chunk_samples)
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def _grow(self, required):
+        """容量不足时按2倍扩容，只在异常大的PCM帧写入时发生"""
+        capacity = len(self._buf)
+        while capacity < required:
+            capacity *= 2
+        buf = np.zeros(capacity, dtype=np.int16)
+        first = min(self._size, len(self._buf) - self._start)
+        buf[:first] = self._buf[self._start : self._start + first]
+        buf[first : self._size] = self._buf[: self._size - first]
+        self._buf = buf
+        self._out = np.empty(capacity, dtype=np.float32)
+        self._start = 0
+
+
+class VADPreGate:
+    """神经网络VAD之前的低成本预判
+
+    设备不说话时，opus DTX/舒适噪声包（只有几个字节）和能量低于自适应噪声底的帧
+    直接判定为静音，不进入模型推理；能量超过门限后的若干帧、以及已经检测到说话期间
+    始终交给模型判断，保证语音开始和结束的检测精度不受影响。
+    """
+
+    # 噪声底上升时的平滑系数，下降时直接跟随当前帧（最小值跟踪）
+    NOISE_FLOOR_ALPHA = 0.05
+    # 能量门限的上限（int16 RMS，约-44dBFS），只跳过明显的静音，
+    # 嘈杂环境下噪声底再高也不会把小声说话过滤掉
+    MAX_THRESHOLD_RMS = 200.0
+
+    def __init__(
+        self,
+        enabled=True,
+        dtx_max_bytes=10,
+        noise_ratio=2.0,
+        min_rms=60.0,
+        hangover_frames=5,
+    ):
+        self.enabled = enabled
+        self.dtx_max_bytes = dtx_max_bytes
+        self.noise_ratio = noise_ratio
+        self.min_rms = min_rms
+        self.hangover_frames = hangover_frames
+
+        # 统计信息
+        self.total_frames = 0
+        self.skipped_dtx = 0
+        self.skipped_energy = 0
+
+    def should_skip(self, session, packet_size, pcm_frame, in_speech) -> bool:
+        """判断当前帧是否可以跳过模型推理"""
+        self.total_frames += 1
+        if not self.enabled:
+            return False
+        session.last_rms = None
+        if in_speech:
+            return False
+        if packet_size is not None and packet_size <= self.dtx_max_bytes:
+            self.skipped_dtx += 1
+            return True
+
+        samples = np.frombuffer(pcm_frame, dtype=np.int16, count=len(pcm_frame) // 2)
+        if len(samples) == 0:
+            return False
+        samples = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(samples, samples) / len(samples)))
+        session.last_rms = rms
+
+        if session.noise_floor is None:
+            # 会话可能从说话中途或者一个很响的帧开始，噪声底从最低门限起步，
+            # 之后由静音帧逐渐抬升
+            session.noise_floor = self.min_rms / self.noise_ratio
+        threshold = min(
+            max(session.noise_floor * self.noise_ratio, self.min_rms),
+            self.MAX_THRESHOLD_RMS,
+        )
+        if rms >= threshold:
+            session.gate_hangover = self.hangover_frames
+            return False
+        if session.gate_hangover > 0:
+            session.gate_hangover -= 1
+            return False
+
+        self._update_noise_floor(session, rms)
+        self.skipped_energy += 1
+        return True
+
+    def observe(self, session, have_voice):
+        """模型判定为静音的帧也用于更新噪声底，使噪声底跟随环境噪声上升"""
+        if not have_voice and session.last_rms is not None:
+            self._update_noise_floor(session, session.last_rms)
+
+    def _update_noise_floor(self, session, rms):
+        if rms < session.noise_floor:
+            session.noise_floor = rms
+        else:
+            session.noise_floor += (rms - session.noise_floor) * self.NOISE_FLOOR_ALPHA
+
+    def get_stats(self):
+        skipped = self.skipped_dtx + self.skipped_energy
+        return {
+            "frames": self.total_frames,
+            "skipped_frames": skipped,
+            "skipped_dtx": self.skipped_dtx,
+            "skipped_energy": self.skipped_energy,
+            "skipped_percent": (
+                skipped / self.total_frames * 100 if self.total_frames else 0.0
+            ),
+        }
+
+
+class VADSession:
+    """单个连接的VAD会话，持有该连接独立的音频缓冲区和模型循环状态
+
+    模型权重由VADProvider持有并在所有连接之间共享
+    """
+
+    def __init__(self, model_state=None, chunk_samples=DEFAULT_CHUNK_SAMPLES):
+        self.audio_buffer = PcmRingBuffer(chunk_samples)
+        self.model_state = model_state
+        # 预判使用的自适应噪声底和能量上升后继续送模型的剩余帧数
+        self.noise_floor = None
+        self.gate_hangover = 0
+        self.last_rms = None
+
+    def reset(self):
+        """清空未处理完的音频，模型循环状态保持连续"""
+        self.audio_buffer.clear()
+
 
 class VADProviderBase(ABC):
+    def create_session(self) -> VADSession:
+        """为新连接创建VAD会话"""
+        return VADSession()
+
     @abstractmethod
-    def is_vad(self, conn, data) -> bool:
-        """检测音频数据中的语音活动"""
+    async def is_vad(self, conn, pcm_frame) -> bool:
+        """检测一帧16kHz单声道PCM中的语音活动"""
         pass
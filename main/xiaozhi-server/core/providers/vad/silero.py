@@ -1,55 +1,219 @@
 import time
+import asyncio
+import threading
 import numpy as np
 import torch
-import opuslib_next
 from config.logger import setup_logging
-from core.providers.vad.base import VADProviderBase
+from core.utils.inference import run_inference, register_model, get_model
+from core.providers.vad.base import VADProviderBase, VADSession, VADPreGate
+from core.utils.stats import register_stats
 
 TAG = __name__
 logger = setup_logging()
 
+# Silero模型每次推理的采样点数（16kHz）
+CHUNK_SAMPLES = 512
+# Silero模型在每个音频块前拼接的上下文采样点数（16kHz）
+CONTEXT_SAMPLES = 64
+
+
+_forward_lock = threading.Lock()
+
+
+def _load_model(model_dir):
+    model, _ = torch.hub.load(
+        repo_or_dir=model_dir,
+        source="local",
+        model="silero_vad",
+        force_reload=False,
+    )
+    return model
+
+
+def silero_forward(model_dir, chunks, state, context):
+    """在推理执行器中对一批音频块执行一次前向推理
+
+    Args:
+        model_dir: 模型目录，进程池模式下子进程据此加载自己的模型
+        chunks: (B, 512) float32 音频块
+        state: (2, B, 128) 各连接的循环状态
+        context: (B, 64) 各连接的上下文采样点
+
+    Returns:
+        tuple: (语音概率, 更新后的循环状态, 更新后的上下文)
+    """
+    model = get_model(("silero", model_dir), _load_model, model_dir)
+    # 模型把循环状态保存在自身属性上，同一进程内的推理需要串行
+    with _forward_lock:
+        # 用各连接自己的状态覆盖模型内部状态，避免连接之间互相污染
+        model._state = torch.from_numpy(state)
+        model._context = torch.from_numpy(context)
+        model._last_sr = 16000
+        model._last_batch_size = chunks.shape[0]
+
+        with torch.no_grad():
+            out = model(torch.from_numpy(chunks), 16000)
+
+        return (
+            out.numpy().reshape(-1),
+            model._state.numpy().copy(),
+            model._context.numpy().copy(),
+        )
+
+
+class SileroState:
+    """单个连接的Silero循环状态，模型权重由所有连接共享"""
+
+    def __init__(self):
+        self.state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.context = np.zeros((1, CONTEXT_SAMPLES), dtype=np.float32)
+
+
+class SileroBatchScheduler:
+    """跨连接的Silero批量推理调度器
+
+    在batch_window_ms时间窗口内收集所有连接已就绪的512采样点音频块，
+    拼接各连接自己的循环状态后提交到推理执行器执行一次批量前向推理，再把概率分发回各连接。
+    """
+
+    def __init__(self, model_dir, batch_window_ms=5, max_batch_size=64):
+        self.model_dir = model_dir
+        self.batch_window = max(float(batch_window_ms), 0.0) / 1000
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self._pending = []
+        self._flush_handle = None
+
+        # 统计信息
+        self.total_chunks = 0
+        self.total_batches = 0
+
+    async def infer(self, chunk: np.ndarray, vad_state: SileroState) -> float:
+        """提交一个音频块，等待批量推理完成后返回语音概率"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((chunk, vad_state, future))
+
+        if self.batch_window <= 0 or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending):
+        vad_states = [vad_state for _, vad_state, _ in pending]
+        try:
+            probs, state, context = await run_inference(
+                silero_forward,
+                self.model_dir,
+                np.stack([chunk for chunk, _, _ in pending]),
+                np.concatenate([s.state for s in vad_states], axis=1),
+                np.concatenate([s.context for s in vad_states], axis=0),
+            )
+            for i, vad_state in enumerate(vad_states):
+                vad_state.state = state[:, i : i + 1, :]
+                vad_state.context = context[i : i + 1, :]
+
+            self.total_chunks += len(pending)
+            self.total_batches += 1
+            for (_, _, future), prob in zip(pending, probs.tolist()):
+                if not future.done():
+                    future.set_result(prob)
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self):
+        return {
+            "chunks": self.total_chunks,
+            "batches": self.total_batches,
+            "avg_batch_size": (
+                self.total_chunks / self.total_batches if self.total_batches else 0
+            ),
+        }
+
 
 class VADProvider(VADProviderBase):
     def __init__(self, config):
         logger.bind(tag=TAG).info("SileroVAD", config)
-        self.model, _ = torch.hub.load(
-            repo_or_dir=config["model_dir"],
-            source="local",
-            model="silero_vad",
-            force_reload=False,
-        )
-
-        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.model_dir = config["model_dir"]
+        self.model = _load_model(self.model_dir)
+        # 线程池模式下推理直接复用这里加载的模型
+        register_model(("silero", self.model_dir), self.model)
 
         # 处理空字符串的情况
         threshold = config.get("threshold", "0.5")
         min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
+        batch_window_ms = config.get("batch_window_ms", "5")
+        max_batch_size = config.get("max_batch_size", "64")
 
         self.vad_threshold = float(threshold) if threshold else 0.5
         self.silence_threshold_ms = (
             int(min_silence_duration_ms) if min_silence_duration_ms else 1000
         )
+        self.scheduler = SileroBatchScheduler(
+            self.model_dir,
+            float(batch_window_ms) if batch_window_ms not in ("", None) else 5,
+            int(max_batch_size) if max_batch_size else 64,
+        )
+
+        pre_gate = config.get("pre_gate", True)
+        dtx_bytes = config.get("pre_gate_dtx_bytes", "10")
+        noise_ratio = config.get("pre_gate_noise_ratio", "2.0")
+        min_rms = config.get("pre_gate_min_rms", "60")
+        hangover_frames = config.get("pre_gate_hangover_frames", "5")
+        self.pre_gate = VADPreGate(
+            enabled=str(pre_gate).lower() in ("true", "1", "yes"),
+            dtx_max_bytes=int(dtx_bytes) if dtx_bytes not in ("", None) else 10,
+            noise_ratio=float(noise_ratio) if noise_ratio else 2.0,
+            min_rms=float(min_rms) if min_rms not in ("", None) else 60,
+            hangover_frames=(
+                int(hangover_frames) if hangover_frames not in ("", None) else 5
+            ),
+        )
+        register_stats("vad", self.get_stats)
 
-    def is_vad(self, conn, opus_packet):
+    def get_stats(self):
+        return {
+            "pre_gate": self.pre_gate.get_stats(),
+            "batch": self.scheduler.get_stats(),
+        }
+
+    def create_session(self) -> VADSession:
+        return VADSession(model_state=SileroState(), chunk_samples=CHUNK_SAMPLES)
+
+    async def is_vad(self, conn, pcm_frame):
         try:
-            pcm_frame = self.decoder.decode(opus_packet, 960)
-            conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
+            if conn.vad_session is None:
+                conn.vad_session = self.create_session()
+            session = conn.vad_session
+
+            # 静音期间的DTX包和低能量帧不进入模型，直接判定为没有声音
+            if self.pre_gate.should_skip(
+                session,
+                conn.uplink_audio.last_packet_size,
+                pcm_frame,
+                conn.client_have_voice,
+            ):
+                session.audio_buffer.clear()
+                return False
+
+            session.audio_buffer.write(pcm_frame)  # 将新数据加入环形缓冲区
 
-            # 处理缓冲区中的完整帧（每次处理512采样点）
+            # 一次取出缓冲区中全部完整的512采样点块，归一化在一次向量运算中完成
             client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                # 提取前512个采样点（1024字节）
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                # 转换为模型需要的张量格式
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_tensor = torch.from_numpy(audio_float32)
-
-                # 检测语音活动
-                with torch.no_grad():
-                    speech_prob = self.model(audio_tensor, 16000).item()
+            for chunk in session.audio_buffer.read_chunks():
+                # 检测语音活动，和其他连接的音频块合并为一次批量推理
+                # chunk是缓冲区输出数组的视图，批量推理在拼接时会复制
+                speech_prob = await self.scheduler.infer(chunk, session.model_state)
                 client_have_voice = speech_prob >= self.vad_threshold
 
                 # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
@@ -57,14 +221,16 @@ class VADProvider(VADProviderBase):
                     stop_duration = (
                         time.time() * 1000 - conn.client_have_voice_last_time
                     )
+                    # 记录当前已经静音的时长，供推测识别判断临时端点
+                    conn.client_silence_ms = stop_duration
                     if stop_duration >= self.silence_threshold_ms:
                         conn.client_voice_stop = True
                 if client_have_voice:
                     conn.client_have_voice = True
                     conn.client_have_voice_last_time = time.time() * 1000
+                    conn.client_silence_ms = 0.0
 
+            self.pre_gate.observe(session, client_have_voice)
             return client_have_voice
-        except opuslib_next.OpusError as e:
-            logger.bind(tag=TAG).info(f"解码错误: {e}")
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
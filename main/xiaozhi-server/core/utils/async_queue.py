@@ -0,0 +1,53 @@
+import asyncio
+
+
+class AsyncQueue:
+    """绑定到连接事件循环的asyncio队列
+
+    消费端是事件循环中的任务，通过 await get() 等待数据，不再需要线程轮询；
+    生产端可以在事件循环或任意线程中调用 put()，跨线程时自动切回事件循环。
+    """
+
+    def __init__(self, loop=None):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+
+    def bind_loop(self, loop):
+        """绑定消费者所在的事件循环，跨线程put时会投递到该循环"""
+        self._loop = loop
+
+    def _in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def put(self, item):
+        if self._loop is None or self._in_loop():
+            self._queue.put_nowait(item)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def get_nowait(self):
+        """队列为空时抛出 asyncio.QueueEmpty"""
+        return self._queue.get_nowait()
+
+    def task_done(self):
+        self._queue.task_done()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self._queue.empty()
+
+    def clear(self):
+        """非阻塞地清空队列"""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
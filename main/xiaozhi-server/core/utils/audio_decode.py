@@ -0,0 +1,420 @@
+"""
+进程内音频解码
+
+TTS每句话、每首音乐和提示音都要转换成16kHz单声道16位PCM。pydub每次解码都会
+启动一个ffmpeg子进程，这里优先在进程内完成解码：
+1. WAV使用wave模块读取，NumPy完成声道合并和多相滤波重采样
+2. MP3、OGG、FLAC等格式在安装了soundfile（libsndfile）时由它解码
+3. 以上都处理不了的格式和文件才回退到pydub + ffmpeg
+
+流式TTS边接收边解码：PCM和WAV流在进程内增量重采样，MP3等压缩格式通过一个
+常驻到本句结束的ffmpeg管道解码。
+"""
+
+import io
+import math
+import wave
+import struct
+import asyncio
+import threading
+import numpy as np
+from pydub import AudioSegment
+from config.logger import setup_logging
+from core.utils.stats import register_stats
+from core.utils.executor import run_blocking
+
+try:
+    import soundfile
+except ImportError:  # 缺少soundfile时回退到ffmpeg，启动时会给出警告
+    soundfile = None
+
+TAG = __name__
+logger = setup_logging()
+
+TARGET_SAMPLE_RATE = 16000
+# soundfile可以解码的格式，libsndfile 1.1.0起支持mp3
+SOUNDFILE_TYPES = {"mp3", "ogg", "oga", "opus", "flac"}
+
+_stats_lock = threading.Lock()
+_stats = {"wave": 0, "soundfile": 0, "ffmpeg": 0}
+
+
+def _count(decoder):
+    with _stats_lock:
+        _stats[decoder] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+register_stats("audio_decode", get_stats)
+
+
+def check_audio_decoders():
+    """启动时检查进程内解码器，MP3等格式需要回退到ffmpeg子进程时给出警告"""
+    if soundfile is None:
+        logger.bind(tag=TAG).warning(
+            "未安装soundfile，MP3/OGG/FLAC音频将启动ffmpeg子进程解码，"
+            "建议执行 pip install soundfile"
+        )
+    elif "MP3" not in soundfile.available_formats():
+        logger.bind(tag=TAG).warning(
+            f"当前libsndfile {soundfile.__libsndfile_version__} 不支持MP3，"
+            "MP3音频将启动ffmpeg子进程解码，建议升级soundfile"
+        )
+
+
+def resample_to_16k(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """把float32单声道采样重采样到16kHz，先低通滤波再抽取，避免高频混叠"""
+    if sample_rate == TARGET_SAMPLE_RATE or len(samples) == 0:
+        return samples
+    resampler = StreamResampler(sample_rate)
+    return np.concatenate((resampler.process(samples), resampler.flush()))
+
+
+def _to_pcm16(samples: np.ndarray) -> bytes:
+    """float32采样转换为16位小端PCM"""
+    np.clip(samples, -1.0, 32767 / 32768, out=samples)
+    samples *= 32768
+    return samples.astype("<i2").tobytes()
+
+
+def _mix_down(samples: np.ndarray, channels: int) -> np.ndarray:
+    if channels == 1:
+        return samples
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+
+def _decode_wav(source):
+    """用wave模块读取整数PCM的WAV，返回float32单声道采样和采样率"""
+    with wave.open(source, "rb") as wf:
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        sample_rate = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (
+            data[:, 0].astype(np.int32)
+            | (data[:, 1].astype(np.int32) << 8)
+            | (data[:, 2].astype(np.int32) << 16)
+        )
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise wave.Error(f"unsupported sample width: {sample_width}")
+
+    return _mix_down(samples, channels), sample_rate
+
+
+def _decode_soundfile(source):
+    samples, sample_rate = soundfile.read(source, dtype="float32", always_2d=True)
+    return samples.mean(axis=1, dtype=np.float32), sample_rate
+
+
+def _decode_ffmpeg(source, file_type):
+    if isinstance(source, io.BytesIO):
+        source.seek(0)
+    # -nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
+    audio = AudioSegment.from_file(source, format=file_type, parameters=["-nostdin"])
+    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
+    audio = audio.set_channels(1).set_frame_rate(TARGET_SAMPLE_RATE).set_sample_width(2)
+    return audio.raw_data
+
+
+def decode_to_pcm(source, file_type=None):
+    """把音频文件或二进制数据解码为16kHz单声道16位PCM
+
+    Args:
+        source: 文件路径或音频二进制数据
+        file_type: 音频格式（扩展名，不带点），为空时从文件路径推断
+
+    Returns:
+        tuple: (PCM数据, 时长秒数)
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif not file_type:
+        file_type = str(source).rsplit(".", 1)[-1] if "." in str(source) else None
+    file_type = (file_type or "").lower()
+
+    samples = None
+    try:
+        if file_type == "wav":
+            samples, sample_rate = _decode_wav(source)
+            _count("wave")
+        elif file_type in SOUNDFILE_TYPES and soundfile is not None:
+            samples, sample_rate = _decode_soundfile(source)
+            _count("soundfile")
+    except Exception as e:
+        # 例如浮点WAV、不支持mp3的旧版libsndfile，交给ffmpeg处理
+        logger.bind(tag=TAG).debug(f"进程内解码{file_type}失败，使用ffmpeg: {e}")
+        samples = None
+
+    if samples is None:
+        pcm = _decode_ffmpeg(source, file_type or None)
+        _count("ffmpeg")
+    else:
+        pcm = _to_pcm16(resample_to_16k(samples, sample_rate))
+    duration = len(pcm) / 2 / TARGET_SAMPLE_RATE
+    return pcm, duration
+
+
+class StreamResampler:
+    """分块到达的float32单声道采样的多相滤波重采样，块之间保持滤波器状态
+
+    按有理数比例 up/down 重采样：概念上插入 up-1 个零、用加Kaiser窗的sinc低通滤波、
+    再每 down 个取一个，实际只计算保留下来的输出采样。截止频率取输入和输出中较低的
+    奈奎斯特频率，下采样时高于8kHz的内容被滤除而不是折叠到可听频段。
+    """
+
+    # 滤波器单侧包含的过零点数，越大过渡带越窄
+    ZERO_CROSSINGS = 16
+    # 截止频率相对奈奎斯特频率的比例，留出过渡带
+    ROLLOFF = 0.9
+    KAISER_BETA = 8.0
+    # 每次最多计算的输出采样数，限制长音频一次解码时的内存
+    BLOCK = 8192
+
+    def __init__(self, sample_rate: int):
+        common = math.gcd(sample_rate, TARGET_SAMPLE_RATE)
+        self.up = TARGET_SAMPLE_RATE // common
+        self.down = sample_rate // common
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+        # 在提高up倍后的采样率上设计低通滤波器
+        rate = max(self.up, self.down)
+        half = self.ZERO_CROSSINGS * rate
+        cutoff = self.ROLLOFF * 0.5 / rate
+        n = np.arange(-half, half + 1, dtype=np.float64)
+        window = np.kaiser(2 * half + 1, self.KAISER_BETA)
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * window
+        # 插零会让幅度变为1/up，这里补偿回来
+        taps *= self.up / taps.sum()
+        self._width = -(-len(taps) // self.up)
+        taps = np.concatenate((taps, np.zeros(self._width * self.up - len(taps))))
+        # _phases[p, j] = taps[p + j * up]，每个输出采样只用到其中一行
+        self._phases = taps.reshape(self._width, self.up).T.astype(np.float32)
+        self._delay = half
+        # _buffer保存输入中从_start开始的采样，信号开始之前视为零
+        self._start = -self._width
+        self._buffer = np.zeros(self._width, dtype=np.float32)
+        self._received = 0
+        self._produced = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return samples
+        self._received += len(samples)
+        return self._run(samples, None)
+
+    def flush(self) -> np.ndarray:
+        """输入结束时补零，输出滤波器延迟中剩余的采样"""
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        total = -(-self._received * self.up // self.down)
+        return self._run(np.zeros(self._width + 1, dtype=np.float32), total)
+
+    def _run(self, samples, limit):
+        buffer = np.concatenate((self._buffer, samples.astype(np.float32, copy=False)))
+        end = self._start + len(buffer)
+        # 输出采样n对应的输入位置为 (n*down + delay) / up，需要的输入都已到达才计算
+        stop = (end * self.up - 1 - self._delay) // self.down + 1
+        if limit is not None:
+            stop = min(stop, limit)
+        outputs = []
+        offsets = np.arange(self._width)
+        for first in range(self._produced, stop, self.BLOCK):
+            positions = np.arange(first, min(first + self.BLOCK, stop)) * self.down
+            positions += self._delay
+            index = (positions // self.up - self._start)[:, None] - offsets
+            outputs.append(
+                np.einsum(
+                    "ij,ij->i", buffer[index], self._phases[positions % self.up]
+                )
+            )
+        self._produced = max(self._produced, stop)
+        # 只保留之后的输出还会用到的输入
+        needed = (self._produced * self.down + self._delay) // self.up
+        needed -= self._width - 1
+        if needed > self._start:
+            buffer = buffer[needed - self._start :]
+            self._start = needed
+        self._buffer = buffer
+        if not outputs:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32, copy=False)
+
+
+class PcmStreamDecoder:
+    """16位小端PCM流转换为16kHz单声道PCM"""
+
+    def __init__(self, sample_rate=TARGET_SAMPLE_RATE, channels=1):
+        self.channels = channels
+        self._block = 2 * channels
+        self._pending = b""
+        self._resampler = StreamResampler(sample_rate)
+
+    def feed(self, chunk: bytes) -> bytes:
+        data = self._pending + bytes(chunk)
+        usable = len(data) - len(data) % self._block
+        self._pending = data[usable:]
+        if not usable:
+            return b""
+        if self.channels == 1 and self._resampler.passthrough:
+            return data[:usable]
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768
+        samples = self._resampler.process(_mix_down(samples, self.channels))
+        return _to_pcm16(samples)
+
+    def flush(self) -> bytes:
+        """流结束时取出重采样滤波器中剩余的音频"""
+        return _to_pcm16(self._resampler.flush())
+
+
+class WavStreamDecoder:
+    """WAV流：先解析头部得到采样率和声道数，之后的数据按PCM流处理"""
+
+    def __init__(self):
+        self._header = b""
+        self._pcm = None
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self._pcm is not None:
+            return self._pcm.feed(chunk)
+        self._header += bytes(chunk)
+        parsed = self._parse_header()
+        if parsed is None:
+            return b""
+        (sample_rate, channels, sample_width), data_offset = parsed
+        if sample_width != 2:
+            raise ValueError(f"流式WAV只支持16位PCM，当前为{sample_width * 8}位")
+        self._pcm = PcmStreamDecoder(sample_rate, channels)
+        return self._pcm.feed(self._header[data_offset:])
+
+    def flush(self) -> bytes:
+        return self._pcm.flush() if self._pcm is not None else b""
+
+    def _parse_header(self):
+        """返回 ((采样率, 声道数, 采样字节数), 音频数据偏移)，头部不完整时返回None"""
+        header = self._header
+        if len(header) < 12:
+            return None
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("不是有效的WAV数据")
+        offset = 12
+        fmt = None
+        while len(header) >= offset + 8:
+            chunk_id = header[offset : offset + 4]
+            chunk_size = struct.unpack_from("<I", header, offset + 4)[0]
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV数据缺少fmt块")
+                return fmt, offset + 8
+            if len(header) < offset + 8 + chunk_size:
+                return None
+            if chunk_id == b"fmt ":
+                _, channels, sample_rate = struct.unpack_from("<HHI", header, offset + 8)
+                bits = struct.unpack_from("<H", header, offset + 22)[0]
+                fmt = (sample_rate, channels, bits // 8)
+            offset += 8 + chunk_size + (chunk_size & 1)
+        return None
+
+
+async def _ffmpeg_decode_stream(chunks, audio_format):
+    """通过ffmpeg管道边写入边读取，把压缩音频流解码为16kHz单声道PCM"""
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-f",
+        audio_format,
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(TARGET_SAMPLE_RATE),
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def write_input():
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    writer = asyncio.create_task(write_input())
+    try:
+        while True:
+            pcm = await process.stdout.read(4096)
+            if not pcm:
+                break
+            yield pcm
+        # 把输入端的异常（如网络错误）抛给调用方
+        await writer
+    finally:
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
+async def decode_stream(
+    chunks, audio_format, sample_rate=TARGET_SAMPLE_RATE, channels=1, executor=None
+):
+    """把分块到达的音频流解码为16kHz单声道16位PCM，边接收边输出
+
+    Args:
+        chunks: 异步迭代的音频数据块
+        audio_format: "pcm"（16位小端，需要指定采样率和声道数）、"wav"，或ffmpeg支持的格式
+        executor: 指定时在其中完成重采样，不占用事件循环
+    """
+    try:
+        if audio_format in ("pcm", "wav"):
+            decoder = (
+                PcmStreamDecoder(sample_rate, channels)
+                if audio_format == "pcm"
+                else WavStreamDecoder()
+            )
+            _count("wave")
+            async for chunk in chunks:
+                if executor is None:
+                    pcm = decoder.feed(chunk)
+                else:
+                    pcm = await run_blocking(decoder.feed, chunk, executor=executor)
+                if pcm:
+                    yield pcm
+            pcm = decoder.flush()
+            if pcm:
+                yield pcm
+        else:
+            _count("ffmpeg")
+            pcm_stream = _ffmpeg_decode_stream(chunks, audio_format)
+            try:
+                async for pcm in pcm_stream:
+                    yield pcm
+            finally:
+                await pcm_stream.aclose()
+    finally:
+        # 提前结束时关闭上游的生成器，及时释放HTTP连接
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
@@ -0,0 +1,267 @@
+"""
+阻塞调用共享执行器
+
+TTS合成、音频转码、聊天记录上报等阻塞调用统一提交到这里，整个进程只有有上限的
+线程池，连接数增长时线程总数保持不变。
+
+大模型对话（含工具调用）一次会占用线程整个回复的时长，单独使用一个对话线程池，
+说话的设备再多也不会占满处理短任务的线程，TTS转码、文件保存等任务始终有线程可用。
+
+线程池按连接公平调度：每个连接有自己的待执行队列，空闲的工作线程按轮询顺序
+依次从各连接的队列取任务，单个连接提交再多任务也不会饿死其他连接。
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future
+from config.logger import setup_logging
+from core.utils.stats import register_stats
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_MAX_WORKERS = 32
+# 对话线程池的默认上限，即同时进行的大模型对话数量
+DEFAULT_CHAT_MAX_WORKERS = 32
+# 不属于任何连接的任务使用的队列
+SERVER_OWNER = "server"
+
+
+class _WorkItem:
+    __slots__ = ("future", "fn", "args", "kwargs", "enqueue_time")
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueue_time = time.monotonic()
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class FairExecutor:
+    """按连接轮询调度的共享线程池"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="task"):
+        self.max_workers = max(int(max_workers), 1)
+        self.thread_name_prefix = thread_name_prefix
+        # owner -> deque[_WorkItem]，OrderedDict的顺序即轮询顺序
+        self._queues = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pending = 0
+        self._idle_workers = 0
+        self._busy_workers = 0
+        self._shutdown = False
+
+        # 统计信息
+        self.total_submitted = 0
+        self.total_completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(self, owner, fn, *args, **kwargs) -> Future:
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            queue = self._queues.get(owner)
+            if queue is None:
+                queue = self._queues[owner] = deque()
+            queue.append(_WorkItem(future, fn, args, kwargs))
+            self._pending += 1
+            self.total_submitted += 1
+            # 空闲线程不够处理排队任务时才新建线程，直到达到上限
+            if (
+                self._pending > self._idle_workers
+                and len(self._threads) < self.max_workers
+            ):
+                self._start_worker()
+            self._cond.notify()
+        return future
+
+    def for_connection(self, owner) -> "ConnectionExecutor":
+        """返回绑定到某个连接的执行器句柄"""
+        return ConnectionExecutor(self, owner)
+
+    def cancel_pending(self, owner):
+        """取消某个连接尚未开始执行的任务"""
+        with self._cond:
+            queue = self._queues.pop(owner, None)
+            if queue:
+                self._pending -= len(queue)
+        if queue:
+            for item in queue:
+                item.future.cancel()
+
+    def _start_worker(self):
+        thread = threading.Thread(
+            target=self._worker,
+            name=f"{self.thread_name_prefix}_{len(self._threads)}",
+            daemon=True,
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _next_item(self):
+        """取出轮询顺序上第一个连接的第一个任务，并把该连接移到队尾"""
+        owner, queue = next(iter(self._queues.items()))
+        item = queue.popleft()
+        self._pending -= 1
+        if queue:
+            self._queues.move_to_end(owner)
+        else:
+            del self._queues[owner]
+        return item
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._idle_workers += 1
+                while not self._queues and not self._shutdown:
+                    self._cond.wait()
+                self._idle_workers -= 1
+                if not self._queues:
+                    return
+                item = self._next_item()
+                wait = time.monotonic() - item.enqueue_time
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                self._busy_workers += 1
+            try:
+                item.run()
+            finally:
+                with self._cond:
+                    self._busy_workers -= 1
+                    self.total_completed += 1
+            del item
+
+    def get_stats(self):
+        with self._cond:
+            depths = [len(queue) for queue in self._queues.values()]
+            started = self.total_submitted - self._pending
+            return {
+                "max_workers": self.max_workers,
+                "threads": len(self._threads),
+                "busy_workers": self._busy_workers,
+                "queue_depth": self._pending,
+                "queued_connections": len(depths),
+                "max_connection_queue_depth": max(depths) if depths else 0,
+                "submitted": self.total_submitted,
+                "completed": self.total_completed,
+                "avg_wait_ms": (
+                    self.total_wait / started * 1000 if started else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for queue in self._queues.values():
+                    for item in queue:
+                        item.future.cancel()
+                self._queues.clear()
+                self._pending = 0
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ConnectionExecutor(Executor):
+    """连接级执行器句柄，提交的任务进入该连接在共享线程池中的队列"""
+
+    def __init__(self, pool: FairExecutor, owner):
+        self._pool = pool
+        self._owner = owner
+        self._closed = False
+
+    def submit(self, fn, /, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        return self._pool.submit(self._owner, fn, *args, **kwargs)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        # 只关闭句柄，不影响其他连接；共享线程池由服务统一关闭
+        self._closed = True
+        if cancel_futures:
+            self._pool.cancel_pending(self._owner)
+
+
+_executor = None
+_chat_executor = None
+_executor_lock = threading.Lock()
+
+
+def init_task_executor(config):
+    """根据配置创建共享执行器和对话执行器，重复调用时保留已创建的执行器"""
+    global _executor, _chat_executor
+    executor_config = config.get("task_executor") or {}
+    max_workers = int(executor_config.get("max_workers", 0) or 0)
+    if max_workers <= 0:
+        max_workers = DEFAULT_MAX_WORKERS
+    chat_max_workers = int(executor_config.get("chat_max_workers", 0) or 0)
+    if chat_max_workers <= 0:
+        chat_max_workers = DEFAULT_CHAT_MAX_WORKERS
+
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+        _executor = FairExecutor(max_workers=max_workers)
+        _chat_executor = FairExecutor(
+            max_workers=chat_max_workers, thread_name_prefix="chat"
+        )
+    register_stats("task_executor", _executor.get_stats)
+    register_stats("chat_executor", _chat_executor.get_stats)
+    logger.bind(tag=TAG).info(
+        f"共享执行器已启动: 工作数={max_workers}, 对话工作数={chat_max_workers}"
+    )
+    return _executor
+
+
+def get_task_executor() -> FairExecutor:
+    if _executor is None:
+        init_task_executor({})
+    return _executor
+
+
+def get_chat_executor() -> FairExecutor:
+    """大模型对话等长时间占用线程的任务使用的执行器"""
+    if _chat_executor is None:
+        init_task_executor({})
+    return _chat_executor
+
+
+async def run_blocking(func, *args, executor: Executor = None):
+    """在共享执行器中运行阻塞函数，不占用事件循环
+
+    Args:
+        executor: 连接级执行器句柄，为空时记在服务端自己的队列上
+    """
+    if executor is None:
+        executor = get_task_executor().for_connection(SERVER_OWNER)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
+
+
+def shutdown_task_executor():
+    global _executor, _chat_executor
+    with _executor_lock:
+        for executor in (_executor, _chat_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _chat_executor = None
@@ -0,0 +1,84 @@
+"""
+共享的异步HTTP客户端
+
+HTTP接口的TTS每句话都要请求一次服务端，每次新建连接都要重新进行TCP和TLS握手。
+这里按 (事件循环, 协议+主机) 复用httpx.AsyncClient，同一主机的请求复用
+keep-alive连接；安装了h2时对支持的服务端使用HTTP/2。
+
+httpx的连接绑定在创建它的事件循环上，所以每个事件循环各自持有一组客户端。
+asyncio.run之类的临时事件循环结束前要调用close_loop_clients关闭其中的连接。
+"""
+
+import asyncio
+import threading
+import importlib.util
+from weakref import WeakKeyDictionary
+from urllib.parse import urlsplit
+import httpx
+from config.logger import setup_logging
+from core.utils.stats import register_stats
+
+TAG = __name__
+logger = setup_logging()
+
+# 没有指定超时时间的请求使用的默认超时（秒），本地部署的TTS合成较慢，读取超时放宽一些
+DEFAULT_TIMEOUT = 60
+CONNECT_TIMEOUT = 10
+# 每个主机最多保持的空闲连接数
+MAX_KEEPALIVE_CONNECTIONS = 20
+# 空闲连接保持时间（秒）
+KEEPALIVE_EXPIRY = 60
+
+# h2是可选依赖，安装后自动启用HTTP/2
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients = WeakKeyDictionary()
+_clients_lock = threading.Lock()
+_created = 0
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """获取当前事件循环中url所在主机的共享客户端，必须在事件循环中调用"""
+    global _created
+    loop = asyncio.get_running_loop()
+    origin = _origin(url)
+    with _clients_lock:
+        loop_clients = _clients.get(loop)
+        if loop_clients is None:
+            loop_clients = _clients[loop] = {}
+        client = loop_clients.get(origin)
+        if client is None or client.is_closed:
+            client = loop_clients[origin] = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+            _created += 1
+            logger.bind(tag=TAG).debug(f"创建HTTP客户端: {origin}")
+        return client
+
+
+async def close_loop_clients():
+    """关闭当前事件循环中的全部客户端，临时事件循环结束前调用"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _clients.pop(loop, {})
+    for client in loop_clients.values():
+        await client.aclose()
+
+
+def get_stats():
+    with _clients_lock:
+        clients = sum(len(loop_clients) for loop_clients in _clients.values())
+    return {"clients": clients, "created": _created}
+
+
+register_stats("http_client", get_stats)
@@ -0,0 +1,168 @@
+"""
+本地模型推理执行器
+
+VAD和本地ASR的推理都提交到这里的线程池/进程池执行，事件循环只负责网络I/O。
+- thread: 线程池，模型在进程内加载一次，所有线程共享
+- process: 进程池，每个子进程按需加载自己的模型副本，可以绕开GIL占满多核，但内存占用更高
+"""
+
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+_executor = None
+_executor_type = "thread"
+_executor_lock = threading.Lock()
+
+# 当前进程内缓存的模型实例，key由各provider自行定义，需要可以被pickle
+_models = {}
+_models_lock = threading.Lock()
+
+
+def init_inference_executor(config):
+    """根据配置创建推理执行器，重复调用时保留已创建的执行器"""
+    global _executor, _executor_type
+    executor_config = config.get("inference_executor") or {}
+    executor_type = str(executor_config.get("type", "thread")).lower()
+    max_workers = int(executor_config.get("max_workers", 0) or 0)
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+        if executor_type == "process":
+            # 使用spawn避免fork出的子进程继承torch/onnxruntime的线程状态
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            executor_type = "thread"
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="inference"
+            )
+        _executor_type = executor_type
+    logger.bind(tag=TAG).info(
+        f"推理执行器已启动: 类型={executor_type}, 工作数={max_workers}"
+    )
+    return _executor
+
+
+def get_inference_executor():
+    if _executor is None:
+        return init_inference_executor({})
+    return _executor
+
+
+def is_process_pool() -> bool:
+    return _executor is not None and _executor_type == "process"
+
+
+async def run_inference(func, *args):
+    """在推理执行器中运行func，进程池模式下func和参数必须可以被pickle"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), func, *args)
+
+
+class BatchScheduler:
+    """跨连接的批量推理调度器
+
+    在batch_window_ms时间窗口内收集各连接提交的输入，达到max_batch_size或窗口结束时，
+    在推理执行器中调用一次 batch_func(*args, items)，batch_func按输入顺序返回结果列表，
+    再把结果分发回各个调用方。
+    """
+
+    def __init__(self, batch_func, args=(), batch_window_ms=10, max_batch_size=8):
+        self.batch_func = batch_func
+        self.args = tuple(args)
+        self.batch_window = max(float(batch_window_ms), 0.0) / 1000
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self._pending = []
+        self._flush_handle = None
+
+        # 统计信息
+        self.total_items = 0
+        self.total_batches = 0
+        self.full_batches = 0
+
+    async def submit(self, item):
+        """提交一个输入，等待所在批次推理完成后返回它的结果"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if self.batch_window <= 0 or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending):
+        try:
+            results = await run_inference(
+                self.batch_func, *self.args, [item for item, _ in pending]
+            )
+            self.total_items += len(pending)
+            self.total_batches += 1
+            if len(pending) >= self.max_batch_size:
+                self.full_batches += 1
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self):
+        avg_batch_size = (
+            self.total_items / self.total_batches if self.total_batches else 0
+        )
+        return {
+            "items": self.total_items,
+            "batches": self.total_batches,
+            "full_batches": self.full_batches,
+            "avg_batch_size": avg_batch_size,
+            "avg_fill_percent": avg_batch_size / self.max_batch_size * 100,
+        }
+
+
+def register_model(key, model):
+    """登记当前进程已加载的模型，线程池模式下推理直接复用该实例"""
+    with _models_lock:
+        _models[key] = model
+
+
+def get_model(key, loader, *args):
+    """获取当前进程内的模型，不存在时调用loader(*args)加载并缓存"""
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = loader(*args)
+                _models[key] = model
+    return model
+
+
+def shutdown_inference_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
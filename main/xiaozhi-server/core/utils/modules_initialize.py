@@ -1,6 +1,9 @@
 from typing import Dict, Any
 from config.logger import setup_logging
+from config.layered_config import to_plain_dict
 from core.utils import tts, llm, intent, memory, vad, asr
+from core.utils.provider_pool import get_shared_provider
+from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
 logger = setup_logging()
@@ -41,9 +44,13 @@ def initialize_modules(
             if "type" not in config["LLM"][select_llm_module]
             else config["LLM"][select_llm_module]["type"]
         )
-        modules["llm"] = llm.create_instance(
+        # 保存了会话状态的LLM（如coze、dify）不放入共享池
+        modules["llm"] = get_shared_provider(
+            "LLM",
             llm_type,
-            config["LLM"][select_llm_module],
+            llm.create_instance,
+            to_plain_dict(config["LLM"][select_llm_module]),
+            shareable=lambda instance: instance.shareable,
         )
         logger.bind(tag=TAG).info(f"Initialize component: LLM successful {select_llm_module}")
 
@@ -57,7 +64,7 @@ def initialize_modules(
         )
         modules["intent"] = intent.create_instance(
             intent_type,
-            config["Intent"][select_intent_module],
+            to_plain_dict(config["Intent"][select_intent_module]),
         )
         logger.bind(tag=TAG).info(f"Initialize component: Intent successful {select_intent_module}")
 
@@ -71,7 +78,7 @@ def initialize_modules(
         )
         modules["memory"] = memory.create_instance(
             memory_type,
-            config["Memory"][select_memory_module],
+            to_plain_dict(config["Memory"][select_memory_module]),
             config.get("summaryMemory", None),
         )
         logger.bind(tag=TAG).info(f"Initialize component: Memory successful {select_memory_module}")
@@ -86,7 +93,7 @@ def initialize_modules(
         )
         modules["vad"] = vad.create_instance(
             vad_type,
-            config["VAD"][select_vad_module],
+            to_plain_dict(config["VAD"][select_vad_module]),
         )
         logger.bind(tag=TAG).info(f"Initialize component: VAD successful {select_vad_module}")
 
@@ -107,7 +114,7 @@ def initialize_tts(config):
     )
     new_tts = tts.create_instance(
         tts_type,
-        config["TTS"][select_tts_module],
+        to_plain_dict(config["TTS"][select_tts_module]),
         str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
     )
     return new_tts
@@ -120,9 +127,13 @@ def initialize_asr(config):
         if "type" not in config["ASR"][select_asr_module]
         else config["ASR"][select_asr_module]["type"]
     )
-    new_asr = asr.create_instance(
+    # 流式ASR在实例上保存了连接的websocket和识别状态，不放入共享池
+    new_asr = get_shared_provider(
+        "ASR",
         asr_type,
-        config["ASR"][select_asr_module],
+        asr.create_instance,
+        to_plain_dict(config["ASR"][select_asr_module]),
         str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
+        shareable=lambda instance: instance.interface_type != InterfaceType.STREAM,
     )
     return new_asr
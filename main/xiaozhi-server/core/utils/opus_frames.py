@@ -0,0 +1,79 @@
+"""
+紧凑的音频帧序列
+
+一段音频通常被切成很多60ms的小帧，用list保存时每一帧都是一个独立的bytes对象，
+除了数据本身还要多出几十字节的对象开销和一次内存分配。长时间播放音乐时每个
+连接会积累成千上万个这样的小对象。
+
+OpusFrames把所有帧拼接在一块连续的缓冲区里，另用array('I')记录每帧的起始位置，
+取帧和切片都返回共享同一块缓冲区的memoryview，不复制音频数据。
+除了opus包，也可以用来保存定长的PCM帧。
+"""
+
+from array import array
+
+
+class OpusFrames:
+    """只读的音频帧序列，接口与list of bytes保持一致：支持len、下标、切片和迭代
+
+    取出的帧是memoryview，可以直接通过websocket发送；需要bytes的地方
+    （例如opus解码器）请使用bytes(frame)转换。
+    """
+
+    __slots__ = ("_buffer", "_offsets")
+
+    def __init__(self, buffer=b"", offsets=None):
+        """
+        Args:
+            buffer: 所有帧拼接后的数据
+            offsets: 每帧在buffer中的起始位置，最后多一项表示结束位置
+        """
+        self._buffer = memoryview(buffer).cast("B")
+        self._offsets = offsets if offsets is not None else array("I", [0])
+
+    @classmethod
+    def pack(cls, frames):
+        """把若干个帧打包成一个OpusFrames"""
+        if isinstance(frames, cls):
+            return frames
+        offsets = array("I", [0])
+        position = 0
+        for frame in frames:
+            position += len(frame)
+            offsets.append(position)
+        return cls(b"".join(frames), offsets)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        count = len(self._offsets) - 1
+        if isinstance(index, slice):
+            start, stop, step = index.indices(count)
+            if step != 1:
+                raise ValueError("OpusFrames只支持步长为1的切片")
+            stop = max(start, stop)
+            return OpusFrames(self._buffer, self._offsets[start : stop + 1])
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("OpusFrames index out of range")
+        return self._buffer[self._offsets[index] : self._offsets[index + 1]]
+
+    def __iter__(self):
+        buffer = self._buffer
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            yield buffer[offsets[i] : offsets[i + 1]]
+
+    @property
+    def nbytes(self):
+        """所有帧的数据总字节数"""
+        return self._offsets[-1] - self._offsets[0]
+
+    def tobytes(self):
+        """所有帧拼接后的数据"""
+        return self._buffer[self._offsets[0] : self._offsets[-1]].tobytes()
+
+    def __repr__(self):
+        return f"OpusFrames(frames={len(self)}, bytes={self.nbytes})"
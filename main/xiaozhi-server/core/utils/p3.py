@@ -1,59 +1,71 @@
 import struct
+from array import array
+from core.utils.opus_frames import OpusFrames
 
-def decode_opus_from_file(input_file):
+# 帧时长（毫秒）
+FRAME_DURATION_MS = 60
+
+
+def _parse_p3(data, source):
     """
-    从p3文件中解码 Opus 数据，并返回一个 Opus 数据包的列表以及总时长。
+    解析p3数据，把所有Opus包拼接到一块连续的缓冲区中，返回OpusFrames以及总时长。
     """
-    opus_datas = []
-    total_frames = 0
-    sample_rate = 16000  # 文件采样率
-    frame_duration_ms = 60  # 帧时长
-    frame_size = int(sample_rate * frame_duration_ms / 1000)
+    data = memoryview(data)
+    payload = bytearray()
+    offsets = array("I", [0])
+    position = 0
+    while position < len(data):
+        # 读取头部（4字节）：[1字节类型，1字节保留，2字节长度]
+        if len(data) - position < 4:
+            break
+        _, _, data_len = struct.unpack_from(">BBH", data, position)
+        position += 4
 
-    with open(input_file, 'rb') as f:
-        while True:
-            # 读取头部（4字节）：[1字节类型，1字节保留，2字节长度]
-            header = f.read(4)
-            if not header:
-                break
+        # 根据头部指定的长度读取 Opus 数据
+        opus_data = data[position : position + data_len]
+        if len(opus_data) != data_len:
+            raise ValueError(
+                f"Data length({len(opus_data)}) mismatch({data_len}) in the {source}."
+            )
+        payload += opus_data
+        offsets.append(len(payload))
+        position += data_len
 
-            # 解包头部信息
-            _, _, data_len = struct.unpack('>BBH', header)
+    opus_datas = OpusFrames(bytes(payload), offsets)
+    # 计算总时长
+    total_duration = (len(opus_datas) * FRAME_DURATION_MS) / 1000.0
+    return opus_datas, total_duration
 
-            # 根据头部指定的长度读取 Opus 数据
-            opus_data = f.read(data_len)
-            if len(opus_data) != data_len:
-                raise ValueError(f"Data length({len(opus_data)}) mismatch({data_len}) in the file.")
 
-            opus_datas.append(opus_data)
-            total_frames += 1
+def decode_opus_from_file(input_file):
+    """
+    从p3文件中解码 Opus 数据，并返回一个 Opus 数据包的序列以及总时长。
+    """
+    with open(input_file, "rb") as f:
+        return _parse_p3(f.read(), "file")
 
-    # 计算总时长
-    total_duration = (total_frames * frame_duration_ms) / 1000.0
-    return opus_datas, total_duration
 
 def decode_opus_from_bytes(input_bytes):
     """
-    从p3二进制数据中解码 Opus 数据，并返回一个 Opus 数据包的列表以及总时长。
+    从p3二进制数据中解码 Opus 数据，并返回一个 Opus 数据包的序列以及总时长。
     """
-    import io
-    opus_datas = []
-    total_frames = 0
-    sample_rate = 16000  # 文件采样率
-    frame_duration_ms = 60  # 帧时长
-    frame_size = int(sample_rate * frame_duration_ms / 1000)
+    return _parse_p3(input_bytes, "bytes")
+
+
+def encode_opus_to_bytes(opus_datas):
+    """
+    把 Opus 数据包序列编码为p3二进制数据，每个包前加4字节头部。
+    """
+    output = bytearray()
+    for opus_data in opus_datas:
+        output += struct.pack(">BBH", 0, 0, len(opus_data))
+        output += opus_data
+    return bytes(output)
 
-    f = io.BytesIO(input_bytes)
-    while True:
-        header = f.read(4)
-        if not header:
-            break
-        _, _, data_len = struct.unpack('>BBH', header)
-        opus_data = f.read(data_len)
-        if len(opus_data) != data_len:
-            raise ValueError(f"Data length({len(opus_data)}) mismatch({data_len}) in the bytes.")
-        opus_datas.append(opus_data)
-        total_frames += 1
 
-    total_duration = (total_frames * frame_duration_ms) / 1000.0
-    return opus_datas, total_duration
\ No newline at end of file
+def encode_opus_to_file(opus_datas, output_file):
+    """
+    把 Opus 数据包序列写入p3文件。
+    """
+    with open(output_file, "wb") as f:
+        f.write(encode_opus_to_bytes(opus_datas))
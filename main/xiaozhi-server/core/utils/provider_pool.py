@@ -0,0 +1,109 @@
+"""
+进程级provider实例池
+
+LLM、VLLM和非流式ASR这类无连接状态的provider，按其配置块的哈希值在进程内共享，
+使用同一个智能体配置的设备复用同一个实例，从而复用已经建立的HTTP连接池和keep-alive连接。
+TTS和流式ASR在实例上保存了连接的队列和会话，仍然每个连接独立创建。
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from config.logger import setup_logging
+from core.utils.stats import register_stats
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_MAX_SIZE = 256
+
+
+def config_fingerprint(kind, provider_type, *args) -> str:
+    """根据provider种类、类型和构造参数计算指纹"""
+    payload = json.dumps(
+        [kind, provider_type, args], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ProviderPool:
+    """按配置指纹缓存provider实例，超过上限时淘汰最久未使用的实例
+
+    被淘汰的实例仍然可以被已经持有它的连接继续使用，只是新连接会重新创建
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max(int(max_size), 1)
+        self._instances = OrderedDict()
+        self._lock = threading.Lock()
+        # 同一指纹只创建一次，不同指纹之间的创建互不阻塞
+        self._creating = {}
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, provider_type, factory, *args, shareable=None):
+        """获取共享实例，不存在时调用 factory(provider_type, *args) 创建
+
+        Args:
+            shareable: 可选的判断函数，返回False的实例不放入池中（如流式ASR）
+        """
+        key = config_fingerprint(kind, provider_type, *args)
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is not None:
+                self._instances.move_to_end(key)
+                self.hits += 1
+                return instance
+            create_lock = self._creating.setdefault(key, threading.Lock())
+
+        with create_lock:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is not None:
+                    self.hits += 1
+                    return instance
+                self.misses += 1
+            try:
+                instance = factory(provider_type, *args)
+            finally:
+                with self._lock:
+                    self._creating.pop(key, None)
+            if shareable is not None and not shareable(instance):
+                return instance
+            with self._lock:
+                self._instances[key] = instance
+                while len(self._instances) > self.max_size:
+                    self._instances.popitem(last=False)
+            logger.bind(tag=TAG).info(
+                f"创建共享{kind}实例: {provider_type}, 指纹={key[:12]}"
+            )
+            return instance
+
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._instances),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_pool = ProviderPool()
+register_stats("provider_pool", _pool.get_stats)
+
+
+def init_provider_pool(config):
+    """根据配置设置实例池上限"""
+    pool_config = config.get("provider_pool") or {}
+    max_size = int(pool_config.get("max_size", 0) or 0)
+    if max_size > 0:
+        _pool.max_size = max_size
+
+
+def get_shared_provider(kind, provider_type, factory, *args, shareable=None):
+    return _pool.get(kind, provider_type, factory, *args, shareable=shareable)
@@ -0,0 +1,38 @@
+"""
+运行指标登记
+
+各组件通过 register_stats 登记一个返回字典的函数，
+/xiaozhi/stats/ 接口调用 collect_stats 汇总当前进程的全部指标。
+"""
+
+import threading
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_stats(name, func):
+    """登记指标函数，同名重复登记时覆盖"""
+    with _providers_lock:
+        _providers[name] = func
+
+
+def unregister_stats(name):
+    with _providers_lock:
+        _providers.pop(name, None)
+
+
+def collect_stats() -> dict:
+    with _providers_lock:
+        providers = list(_providers.items())
+    stats = {}
+    for name, func in providers:
+        try:
+            stats[name] = func()
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"获取指标失败: {name}, {e}")
+    return stats
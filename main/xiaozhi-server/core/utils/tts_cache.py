@@ -0,0 +1,174 @@
+"""
+进程级TTS音频缓存
+
+播放提示、绑定提示、问候语和常见的简短回复每天会被重复合成很多次。
+合成结果按 (TTS配置, 音色, 归一化文本, 输出格式) 计算内容哈希作为键，
+缓存最终发送给设备的音频帧：内存层是按字节数限制大小的LRU，
+可选的磁盘层把opus帧保存为p3文件，重启后仍然可以命中。
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from config.logger import setup_logging
+from core.utils import p3
+from core.utils.opus_frames import OpusFrames
+from core.utils.stats import register_stats
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_MAX_MEMORY_MB = 32
+# 超过这个长度的文本基本不会重复出现，不放入缓存
+DEFAULT_MAX_TEXT_LENGTH = 50
+
+
+def normalize_text(text: str) -> str:
+    """去掉首尾空白并合并连续空白，避免只有空白不同的文本重复缓存"""
+    return " ".join(text.split())
+
+
+def tts_cache_key(namespace, voice, text, audio_format) -> str:
+    payload = "\x1f".join(
+        [str(namespace), str(voice), normalize_text(text), str(audio_format)]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """内存LRU加可选磁盘层的TTS音频缓存"""
+
+    def __init__(
+        self,
+        enabled=False,
+        max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+        disk_dir=None,
+        max_text_length=DEFAULT_MAX_TEXT_LENGTH,
+    ):
+        self.enabled = enabled
+        self.max_bytes = int(float(max_memory_mb) * 1024 * 1024)
+        self.disk_dir = disk_dir or None
+        self.max_text_length = int(max_text_length)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.requests = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def cacheable(self, text) -> bool:
+        return self.enabled and bool(text) and len(text) <= self.max_text_length
+
+    def get_memory(self, key):
+        """查询内存层，未命中时返回None"""
+        with self._lock:
+            self.requests += 1
+            audio_datas = self._entries.get(key)
+            if audio_datas is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            return audio_datas
+
+    def get_disk(self, key):
+        """查询磁盘层，命中后放回内存层，会读文件，请在执行器中调用"""
+        if not self.disk_dir:
+            return None
+        file_path = self._disk_path(key)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            audio_datas, _ = p3.decode_opus_from_file(file_path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"读取TTS缓存文件失败: {file_path}, {e}")
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self._put_memory(key, audio_datas)
+        return audio_datas
+
+    def put(self, key, audio_datas):
+        """放入内存层，返回打包后的音频帧，后续直接使用返回值即可"""
+        audio_datas = OpusFrames.pack(audio_datas)
+        with self._lock:
+            self.stores += 1
+        self._put_memory(key, audio_datas)
+        return audio_datas
+
+    def save_disk(self, key, audio_datas):
+        """写入磁盘层，会写文件，请在执行器中调用。只保存opus帧"""
+        if not self.disk_dir:
+            return
+        file_path = self._disk_path(key)
+        if os.path.exists(file_path):
+            return
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+            p3.encode_opus_to_file(audio_datas, tmp_path)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"写入TTS缓存文件失败: {file_path}, {e}")
+
+    def _put_memory(self, key, audio_datas):
+        size = audio_datas.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = audio_datas
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.p3")
+
+    def get_stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "requests": self.requests,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.requests - hits,
+                "hit_rate": hits / self.requests if self.requests else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+_cache = TTSCache()
+register_stats("tts_cache", _cache.get_stats)
+
+
+def init_tts_cache(config):
+    """根据配置开启TTS缓存"""
+    cache_config = config.get("tts_cache") or {}
+    _cache.enabled = bool(cache_config.get("enable", False))
+    _cache.max_bytes = int(
+        float(cache_config.get("max_memory_mb") or DEFAULT_MAX_MEMORY_MB) * 1024 * 1024
+    )
+    _cache.disk_dir = cache_config.get("disk_dir") or None
+    _cache.max_text_length = int(
+        cache_config.get("max_text_length") or DEFAULT_MAX_TEXT_LENGTH
+    )
+    if _cache.enabled:
+        logger.bind(tag=TAG).info(
+            f"TTS缓存已开启，内存上限{_cache.max_bytes // (1024 * 1024)}MB，"
+            f"磁盘目录: {_cache.disk_dir or '未开启'}"
+        )
+
+
+def get_tts_cache() -> TTSCache:
+    return _cache
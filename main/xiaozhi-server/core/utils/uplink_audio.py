@@ -0,0 +1,101 @@
+"""
+上行音频阶段
+
+设备上传的每个opus包只在这里解码一次，得到的16kHz单声道PCM由VAD、ASR、
+流式ASR和聊天记录上报共同使用，不再各自创建解码器重复解码。
+"""
+
+import opuslib_next
+from itertools import chain
+from collections import deque
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+# 每个opus包最多解码的采样点数（60ms）
+FRAME_SAMPLES = 960
+# 最近PCM帧环形缓冲区的长度，用作流式ASR建连前的预录音
+RECENT_FRAMES = 10
+# 说话前保留的静音帧数，作为识别音频的预录音
+PREROLL_FRAMES = 10
+
+
+class UplinkAudio:
+    """单个连接的上行音频解码器和最近PCM帧的环形缓冲区"""
+
+    def __init__(self, audio_format="opus", recent_frames=RECENT_FRAMES):
+        self.audio_format = audio_format
+        self._decoder = None
+        # 最近一个上行包的字节数，PCM格式上传时为None，供VAD预判识别opus DTX包
+        self.last_packet_size = None
+        self.recent = deque(maxlen=recent_frames)
+
+    def decode(self, packet: bytes) -> bytes:
+        """把一个上行音频包转换为PCM，解码失败时返回空字节串"""
+        if not packet:
+            self.last_packet_size = None
+            return b""
+        if self.audio_format == "pcm":
+            self.last_packet_size = None
+            pcm_frame = packet
+        else:
+            self.last_packet_size = len(packet)
+            if self._decoder is None:
+                self._decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+            try:
+                pcm_frame = self._decoder.decode(packet, FRAME_SAMPLES)
+            except opuslib_next.OpusError as e:
+                logger.bind(tag=TAG).info(f"解码错误: {e}")
+                return b""
+        self.recent.append(pcm_frame)
+        return pcm_frame
+
+    def reset(self):
+        self.recent.clear()
+
+
+class UtteranceBuffer:
+    """当前这句话的PCM帧
+
+    说话前的帧只保留在固定长度的预录音队列里，旧帧自动丢弃；开始说话后帧直接
+    追加到列表中。说话结束时通过take()整体交换出去，全程不复制音频数据。
+    """
+
+    def __init__(self, preroll_frames=PREROLL_FRAMES):
+        self._preroll = deque(maxlen=preroll_frames)
+        self._frames = []
+
+    def append_preroll(self, pcm_frame: bytes):
+        """追加一帧说话前的音频，只保留最近的几帧"""
+        self._preroll.append(pcm_frame)
+
+    def append(self, pcm_frame: bytes):
+        """追加一帧这句话的音频，第一帧到来时并入预录音"""
+        if self._preroll:
+            self._frames.extend(self._preroll)
+            self._preroll.clear()
+        self._frames.append(pcm_frame)
+
+    def extend(self, pcm_frames):
+        for pcm_frame in pcm_frames:
+            self.append(pcm_frame)
+
+    def take(self) -> list:
+        """取出这句话的全部帧，缓冲区换成新的空列表"""
+        if self._preroll:
+            self._frames.extend(self._preroll)
+            self._preroll.clear()
+        frames, self._frames = self._frames, []
+        return frames
+
+    def clear(self):
+        self._preroll.clear()
+        self._frames = []
+
+    def __len__(self):
+        return len(self._preroll) + len(self._frames)
+
+    def __iter__(self):
+        return chain(self._preroll, self._frames)
@@ -5,11 +5,12 @@ import re
 import os
 import wave
 from io import BytesIO
+from array import array
 from core.utils import p3
-import numpy as np
+from core.utils.opus_frames import OpusFrames
 import requests
 import opuslib_next
-from pydub import AudioSegment
+from core.utils.audio_decode import decode_to_pcm
 import copy
 
 TAG = __name__
@@ -760,19 +761,8 @@ def audio_to_data(audio_file_path, is_opus=True):
     file_type = os.path.splitext(audio_file_path)[1]
     if file_type:
         file_type = file_type.lstrip(".")
-    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-    audio = AudioSegment.from_file(
-        audio_file_path, format=file_type, parameters=["-nostdin"]
-    )
-
-    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
-    # 音频时长(秒)
-    duration = len(audio) / 1000.0
-
-    # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
+    # 解码为单声道/16kHz采样率/16位小端编码的PCM（确保与编码器匹配）
+    raw_data, duration = decode_to_pcm(audio_file_path, file_type)
     return pcm_to_data(raw_data, is_opus), duration
 
 
@@ -784,15 +774,13 @@ def audio_bytes_to_data(audio_bytes, file_type, is_opus=True):
         # 直接用p3解码
         return p3.decode_opus_from_bytes(audio_bytes)
     else:
-        # 其他格式用pydub
-        audio = AudioSegment.from_file(BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"])
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-        duration = len(audio) / 1000.0
-        raw_data = audio.raw_data
+        # 其他格式优先在进程内解码，无法处理时回退到ffmpeg
+        raw_data, duration = decode_to_pcm(audio_bytes, file_type)
         return pcm_to_data(raw_data, is_opus), duration
 
 
 def pcm_to_data(raw_data, is_opus=True):
+    """把16kHz单声道PCM切成60ms的帧，返回打包在一起的OpusFrames"""
     # 初始化Opus编码器
     encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
 
@@ -800,27 +788,26 @@ def pcm_to_data(raw_data, is_opus=True):
     frame_duration = 60  # 60ms per frame
     frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
 
-    datas = []
+    payload = bytearray()
+    offsets = array("I", [0])
+    raw_view = memoryview(raw_data)
     # 按帧处理所有音频数据（包括最后一帧可能补零）
     for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
         # 获取当前帧的二进制数据
-        chunk = raw_data[i : i + frame_size * 2]
+        chunk = raw_view[i : i + frame_size * 2]
 
         # 如果最后一帧不足，补零
         if len(chunk) < frame_size * 2:
-            chunk += b"\x00" * (frame_size * 2 - len(chunk))
+            chunk = bytes(chunk) + b"\x00" * (frame_size * 2 - len(chunk))
 
         if is_opus:
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
             # 编码Opus数据
-            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
+            payload += encoder.encode(bytes(chunk), frame_size)
         else:
-            frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-
-        datas.append(frame_data)
+            payload += chunk
+        offsets.append(len(payload))
 
-    return datas
+    return OpusFrames(bytes(payload), offsets)
 
 
 def opus_datas_to_wav_bytes(opus_datas, sample_rate=16000, channels=1):
@@ -835,7 +822,7 @@ def opus_datas_to_wav_bytes(opus_datas, sample_rate=16000, channels=1):
 
     for opus_frame in opus_datas:
         # 解码为PCM（返回bytes，2字节/采样点）
-        pcm = decoder.decode(opus_frame, frame_size)
+        pcm = decoder.decode(bytes(opus_frame), frame_size)
         pcm_datas.append(pcm)
 
     pcm_bytes = b''.join(pcm_datas)
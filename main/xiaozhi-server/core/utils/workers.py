@@ -0,0 +1,297 @@
+"""
+多进程工作模式
+
+主进程作为守护进程启动N个工作进程，每个工作进程运行完整的WebSocket和HTTP服务，
+通过SO_REUSEPORT共享监听端口，由内核把新连接分配给各个工作进程。
+本地模型（Silero、FunASR等）在每个工作进程内各自加载一份。
+
+- 工作进程异常退出时，守护进程会自动重启，连续快速崩溃时逐步加大重启间隔
+- 守护进程收到SIGHUP时依次重启全部工作进程（用于重新加载配置）：先启动新进程，
+  等它开始监听端口后再停止对应的旧进程，重启期间端口始终有进程在监听
+- 各工作进程定期把自己的运行指标写到 WORKER_STATS_DIR，任意一个工作进程的
+  /xiaozhi/stats/ 接口都会汇总全部工作进程的指标
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import multiprocessing
+from multiprocessing.connection import wait
+from config.logger import setup_logging
+from core.utils.stats import collect_stats
+
+TAG = __name__
+logger = setup_logging()
+
+WORKER_ID_ENV = "XIAOZHI_WORKER_ID"
+WORKER_STATS_DIR = "tmp/worker_stats"
+# 工作进程写入指标的间隔（秒）
+STATS_PUBLISH_INTERVAL = 5
+# 超过该时长仍未更新的指标文件视为已退出的工作进程
+STATS_EXPIRE_SECONDS = STATS_PUBLISH_INTERVAL * 3
+# 工作进程运行不足该时长就退出，视为快速崩溃
+FAST_CRASH_SECONDS = 10
+MAX_RESTART_DELAY = 30
+# 滚动重启时等待新工作进程开始监听的最长时间（秒），本地模型加载可能较慢
+READY_TIMEOUT = 300
+
+# 守护进程传给工作进程的就绪事件，开始监听端口后置位
+_ready_event = None
+
+
+def get_worker_id():
+    """当前工作进程的编号，非多进程模式下返回None"""
+    worker_id = os.environ.get(WORKER_ID_ENV)
+    return int(worker_id) if worker_id is not None else None
+
+
+def is_worker_process() -> bool:
+    return get_worker_id() is not None
+
+
+def reuse_port_supported() -> bool:
+    return sys.platform != "win32" and hasattr(socket, "SO_REUSEPORT")
+
+
+def notify_worker_ready():
+    """工作进程开始监听端口后调用，通知守护进程可以停止旧进程"""
+    if _ready_event is not None:
+        _ready_event.set()
+
+
+def _worker_main(target, worker_id, ready_event, args):
+    global _ready_event
+    _ready_event = ready_event
+    target(worker_id, *args)
+
+
+def _stats_file(worker_id):
+    return os.path.join(WORKER_STATS_DIR, f"worker-{worker_id}.json")
+
+
+def _write_stats(worker_id):
+    data = {
+        "pid": os.getpid(),
+        "updated_at": time.time(),
+        "stats": collect_stats(),
+    }
+    path = _stats_file(worker_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+async def publish_worker_stats():
+    """定期把当前工作进程的指标写入共享目录"""
+    worker_id = get_worker_id()
+    if worker_id is None:
+        return
+    os.makedirs(WORKER_STATS_DIR, exist_ok=True)
+    while True:
+        try:
+            _write_stats(worker_id)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"写入工作进程指标失败: {e}")
+        await asyncio.sleep(STATS_PUBLISH_INTERVAL)
+
+
+def _merge_stats(total, stats):
+    """合并两个指标字典：max_开头取最大值，avg_开头或_rate、_percent结尾取平均值，其余数值相加"""
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _merge_stats(total.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            counts = total.setdefault("_avg_count", {})
+            if key not in total:
+                total[key] = value
+                counts[key] = 1
+            elif key.startswith("max_"):
+                total[key] = max(total[key], value)
+            elif key.startswith("avg_") or key.endswith(("_rate", "_percent")):
+                counts[key] += 1
+                total[key] += (value - total[key]) / counts[key]
+            else:
+                total[key] += value
+
+
+def _drop_avg_counts(stats):
+    stats.pop("_avg_count", None)
+    for value in stats.values():
+        if isinstance(value, dict):
+            _drop_avg_counts(value)
+
+
+def aggregate_worker_stats() -> dict:
+    """汇总所有存活工作进程的指标，当前进程使用实时数据"""
+    worker_id = get_worker_id()
+    if worker_id is None:
+        return collect_stats()
+
+    workers = {str(worker_id): {"pid": os.getpid(), "stats": collect_stats()}}
+    now = time.time()
+    if os.path.isdir(WORKER_STATS_DIR):
+        for file_name in os.listdir(WORKER_STATS_DIR):
+            if not file_name.startswith("worker-") or not file_name.endswith(".json"):
+                continue
+            other_id = file_name[len("worker-") : -len(".json")]
+            if other_id in workers:
+                continue
+            try:
+                with open(
+                    os.path.join(WORKER_STATS_DIR, file_name), "r", encoding="utf-8"
+                ) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - data.get("updated_at", 0) > STATS_EXPIRE_SECONDS:
+                continue
+            workers[other_id] = {"pid": data.get("pid"), "stats": data["stats"]}
+
+    total = {}
+    for worker in workers.values():
+        _merge_stats(total, worker["stats"])
+    _drop_avg_counts(total)
+    return {"workers": workers, "total": total}
+
+
+class WorkerSupervisor:
+    """启动并守护N个工作进程"""
+
+    def __init__(self, workers, target, args=()):
+        self.workers = max(int(workers), 1)
+        self.target = target
+        self.args = args
+        self.ctx = multiprocessing.get_context("spawn")
+        self.processes = {}
+        self.started_at = {}
+        # 就绪事件需要保持引用，否则子进程还没读取就可能被回收
+        self.ready_events = {}
+        self.restart_delay = {}
+        self.stopping = False
+        self.reload_requested = False
+
+    def _start_worker(self, worker_id):
+        """启动工作进程，返回它的就绪事件"""
+        ready_event = self.ctx.Event()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(self.target, worker_id, ready_event, self.args),
+            name=f"xiaozhi-worker-{worker_id}",
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.started_at[worker_id] = time.monotonic()
+        self.ready_events[worker_id] = ready_event
+        logger.bind(tag=TAG).info(f"工作进程 {worker_id} 已启动, pid={process.pid}")
+        return ready_event
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def _wait_ready(self, process, ready_event):
+        """等待新工作进程开始监听，返回是否就绪"""
+        deadline = time.monotonic() + READY_TIMEOUT
+        while not self.stopping and time.monotonic() < deadline:
+            if ready_event.wait(0.5):
+                return True
+            if not process.is_alive():
+                return False
+        return ready_event.is_set()
+
+    @staticmethod
+    def _stop_process(process):
+        process.terminate()
+        process.join(10)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _restart_all(self):
+        """逐个重启工作进程：新进程开始监听后再停止旧进程，保证端口始终有进程在监听"""
+        logger.bind(tag=TAG).info("收到重启指令，开始依次重启工作进程")
+        for worker_id in list(self.processes):
+            if self.stopping:
+                return
+            old_process = self.processes[worker_id]
+            old_started_at = self.started_at[worker_id]
+            old_ready_event = self.ready_events[worker_id]
+            ready_event = self._start_worker(worker_id)
+            new_process = self.processes[worker_id]
+            if not self._wait_ready(new_process, ready_event):
+                if new_process.is_alive():
+                    self._stop_process(new_process)
+                # 新进程没能启动，保留旧进程继续服务
+                self.processes[worker_id] = old_process
+                self.started_at[worker_id] = old_started_at
+                self.ready_events[worker_id] = old_ready_event
+                logger.bind(tag=TAG).error(
+                    f"工作进程 {worker_id} 的新进程未能就绪, 保留旧进程 pid={old_process.pid}"
+                )
+                continue
+            self._stop_process(old_process)
+            logger.bind(tag=TAG).info(
+                f"工作进程 {worker_id} 已切换到新进程, pid={new_process.pid}"
+            )
+
+    def _on_worker_exit(self, worker_id):
+        process = self.processes[worker_id]
+        uptime = time.monotonic() - self.started_at[worker_id]
+        if uptime < FAST_CRASH_SECONDS:
+            delay = min(self.restart_delay.get(worker_id, 0.5) * 2, MAX_RESTART_DELAY)
+        else:
+            delay = 1
+        self.restart_delay[worker_id] = delay
+        logger.bind(tag=TAG).error(
+            f"工作进程 {worker_id} 已退出, pid={process.pid}, 退出码={process.exitcode}, "
+            f"{delay:.0f}秒后重启"
+        )
+        deadline = time.monotonic() + delay
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(0.2)
+        if not self.stopping:
+            self._start_worker(worker_id)
+
+    def run(self):
+        os.makedirs(WORKER_STATS_DIR, exist_ok=True)
+        for file_name in os.listdir(WORKER_STATS_DIR):
+            os.remove(os.path.join(WORKER_STATS_DIR, file_name))
+
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        for worker_id in range(self.workers):
+            self._start_worker(worker_id)
+
+        try:
+            while not self.stopping:
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self._restart_all()
+                    continue
+                sentinels = {p.sentinel: i for i, p in self.processes.items()}
+                for sentinel in wait(list(sentinels), timeout=1):
+                    if self.stopping:
+                        break
+                    self._on_worker_exit(sentinels[sentinel])
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        logger.bind(tag=TAG).info("正在停止全部工作进程...")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(10)
+            if process.is_alive():
+                process.kill()
+        logger.bind(tag=TAG).info("全部工作进程已停止")
@@ -0,0 +1,169 @@
+"""
+远程流式ASR的预热websocket连接池
+
+TLS握手、鉴权和协议初始化都在后台提前完成，检测到用户开始说话时直接取出一个
+已经初始化好的会话使用，不再占用每一轮对话的关键路径。每个会话只使用一次，
+取出后由后台任务补充新的会话。
+
+只有在有连接使用时才补充：空闲超时的会话直接丢弃，不会自动重建，没有设备
+说话时不会一直占用（按时长计费的）服务端会话。建连连续失败时按指数退避重试，
+失败次数过多或鉴权失败后停止预热，直到再次成功建立会话。
+
+连接池按provider配置的指纹在进程内共享，相同配置的所有连接共用一个池。
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from websockets.protocol import State
+from websockets.exceptions import InvalidStatus
+from config.logger import setup_logging
+from core.utils.stats import register_stats
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_POOL_SIZE = 2
+# 预热会话的最长空闲时间（秒），超过后丢弃，避免使用已被服务端超时关闭的会话
+DEFAULT_MAX_IDLE_SECONDS = 15
+# 补充会话失败后的首次重试间隔（秒），之后每次翻倍
+REFILL_RETRY_DELAY = 1
+# 连续失败达到这个次数后停止预热
+MAX_CONNECT_FAILURES = 3
+# 这些HTTP状态码表示鉴权失败，重试也不会成功
+AUTH_FAILURE_STATUS = (401, 403)
+
+
+class WarmConnectionPool:
+    """预先建立并初始化好的一次性websocket会话池"""
+
+    def __init__(self, name, connect, size=DEFAULT_POOL_SIZE, max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS):
+        """
+        Args:
+            connect: 异步函数，返回一个已经完成鉴权和初始化的websocket会话
+        """
+        self.name = name
+        self._connect = connect
+        self.size = max(int(size), 0)
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = deque()
+        self._refill_task = None
+        self._failures = 0
+        # 连续建连失败或鉴权失败后停止预热，下次直接建连成功后恢复
+        self.disabled = False
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.expired = 0
+
+    def warm_up(self):
+        """在事件循环中调用，后台把池补满"""
+        if self.size <= 0 or self.disabled:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def acquire(self):
+        """取出一个预热好的会话，池为空时直接新建"""
+        now = time.monotonic()
+        while self._idle:
+            ws, created_at = self._idle.popleft()
+            if ws.state is State.OPEN and now - created_at < self.max_idle_seconds:
+                self.hits += 1
+                self.warm_up()
+                return ws
+            self.expired += 1
+            asyncio.create_task(ws.close())
+
+        self.misses += 1
+        ws = await self._connect()
+        self.created += 1
+        if self.disabled:
+            logger.bind(tag=TAG).info(f"{self.name} 会话建立成功，恢复预热")
+            self.disabled = False
+            self._failures = 0
+        self.warm_up()
+        return ws
+
+    async def _refill(self):
+        while len(self._idle) < self.size:
+            try:
+                ws = await self._connect()
+            except Exception as e:
+                if self._record_failure(e):
+                    return
+                await asyncio.sleep(REFILL_RETRY_DELAY * 2 ** (self._failures - 1))
+                continue
+            self._failures = 0
+            self.created += 1
+            self._idle.append((ws, time.monotonic()))
+            # 到期后丢弃，不自动补充，下次有人取用时再补
+            asyncio.get_running_loop().call_later(
+                self.max_idle_seconds, self._expire_idle
+            )
+
+    def _record_failure(self, error):
+        """记录一次预热失败，返回是否停止预热"""
+        self._failures += 1
+        auth_failed = (
+            isinstance(error, InvalidStatus)
+            and error.response.status_code in AUTH_FAILURE_STATUS
+        )
+        if auth_failed or self._failures >= MAX_CONNECT_FAILURES:
+            self.disabled = True
+            logger.bind(tag=TAG).error(
+                f"{self.name} 预热会话建立失败{self._failures}次，停止预热，"
+                f"请检查配置或服务是否正常: {error}"
+            )
+            return True
+        logger.bind(tag=TAG).warning(f"{self.name} 预热会话建立失败: {error}")
+        return False
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] >= self.max_idle_seconds:
+            ws, _ = self._idle.popleft()
+            self.expired += 1
+            asyncio.create_task(ws.close())
+
+    def get_stats(self):
+        return {
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created,
+            "expired": self.expired,
+            "disabled": int(self.disabled),
+        }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_warm_pool(name, key, connect, size=DEFAULT_POOL_SIZE, max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS):
+    """获取相同配置共享的连接池，不存在时创建"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = WarmConnectionPool(
+                name, connect, size, max_idle_seconds
+            )
+        return pool
+
+
+def get_pools_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    stats = {}
+    for pool in pools:
+        total = stats.setdefault(pool.name, {})
+        for key, value in pool.get_stats().items():
+            total[key] = total.get(key, 0) + value
+    return stats
+
+
+register_stats("asr_ws_pool", get_pools_stats)
@@ -1,19 +1,38 @@
+import time
 import asyncio
 import websockets
 from config.logger import setup_logging
 from core.connection import ConnectionHandler
 from config.config_loader import get_config_from_api
+from config.manage_api_client import clear_agent_models_cache
+from core.utils.inference import init_inference_executor
+from core.utils.stats import register_stats
+from core.utils.workers import is_worker_process, notify_worker_ready
+from core.utils.executor import init_task_executor
+from core.utils.provider_pool import init_provider_pool
+from core.utils.tts_cache import init_tts_cache
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
 
 TAG = __name__
 
+# 空闲连接清理任务的检查间隔（秒）
+IDLE_SWEEP_INTERVAL = 5
+
 
 class WebSocketServer:
     def __init__(self, config: dict):
         self.config = config
         self.logger = setup_logging()
         self.config_lock = asyncio.Lock()
+        # 推理执行器需要在本地VAD/ASR模型加载之前创建
+        init_inference_executor(self.config)
+        # TTS合成、上报等阻塞调用使用的共享执行器
+        init_task_executor(self.config)
+        # 相同配置的LLM、VLLM和非流式ASR在连接间共享实例
+        init_provider_pool(self.config)
+        # 重复出现的提示语和简短回复直接使用缓存的合成结果
+        init_tts_cache(self.config)
         modules = initialize_modules(
             self.logger,
             self.config,
@@ -31,16 +50,30 @@ class WebSocketServer:
         self._memory = modules["memory"] if "memory" in modules else None
 
         self.active_connections = set()
+        # 空闲超时正在关闭的连接任务，保留引用避免任务被回收
+        self._closing_tasks = set()
+        register_stats("websocket", self.get_stats)
 
     async def start(self):
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
         port = int(server_config.get("port", 8000))
 
-        async with websockets.serve(
-            self._handle_connection, host, port, process_request=self._http_response
-        ):
-            await asyncio.Future()
+        sweeper_task = asyncio.create_task(self._sweep_idle_connections())
+        try:
+            # 多进程模式下各工作进程通过SO_REUSEPORT共享同一个端口
+            async with websockets.serve(
+                self._handle_connection,
+                host,
+                port,
+                process_request=self._http_response,
+                reuse_port=is_worker_process() or None,
+            ):
+                # 端口已经开始监听，滚动重启时守护进程可以停止旧进程了
+                notify_worker_ready()
+                await asyncio.Future()
+        finally:
+            sweeper_task.cancel()
 
     async def _handle_connection(self, websocket):
         """处理新连接，每次创建独立的ConnectionHandler"""
@@ -60,6 +93,34 @@ class WebSocketServer:
         finally:
             self.active_connections.discard(handler)
 
+    async def _sweep_idle_connections(self):
+        """定期检查所有连接的最后活跃时间，关闭超时的连接
+
+        代替每个连接在每条消息上取消并重建超时任务，整个服务只有这一个定时任务
+        """
+        while True:
+            await asyncio.sleep(IDLE_SWEEP_INTERVAL)
+            now = time.monotonic()
+            for handler in list(self.active_connections):
+                try:
+                    if handler.is_idle_timeout(now):
+                        handler.logger.bind(tag=TAG).info("连接超时，准备关闭")
+                        # 先置位停止事件，避免下一轮检查重复关闭
+                        handler.stop_event.set()
+                        task = asyncio.create_task(handler.close(handler.websocket))
+                        self._closing_tasks.add(task)
+                        task.add_done_callback(self._on_idle_close_done)
+                except Exception as e:
+                    self.logger.bind(tag=TAG).error(f"空闲连接检查出错: {e}")
+
+    def _on_idle_close_done(self, task):
+        self._closing_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.bind(tag=TAG).error(f"关闭空闲连接出错: {task.exception()}")
+
+    def get_stats(self):
+        return {"connections": len(self.active_connections)}
+
     async def _http_response(self, websocket, request_headers):
         # 检查是否为 WebSocket 升级请求
         if request_headers.headers.get("connection", "").lower() == "upgrade":
@@ -83,6 +144,8 @@ class WebSocketServer:
                     self.logger.bind(tag=TAG).error("获取新配置失败")
                     return False
                 self.logger.bind(tag=TAG).info(f"获取新配置成功")
+                # 智控台配置已变更，设备的差异化配置需要重新获取
+                clear_agent_models_cache()
                 # 检查 VAD 和 ASR 类型是否需要更新
                 update_vad = check_vad_update(self.config, new_config)
                 update_asr = check_asr_update(self.config, new_config)
@@ -0,0 +1,107 @@
+import io
+import time
+import wave
+import logging
+
+import numpy as np
+from tabulate import tabulate
+
+from core.utils import audio_decode
+from core.utils.audio_decode import decode_to_pcm
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+# 每句话的时长（秒），与一般TTS句子长度相当
+SENTENCE_SECONDS = 3.0
+
+
+def _make_wav(sample_rate, channels, seconds=SENTENCE_SECONDS):
+    """生成一段模拟TTS输出的WAV数据"""
+    rng = np.random.default_rng(sample_rate + channels)
+    samples = (rng.standard_normal(int(sample_rate * seconds) * channels) * 3000).astype(
+        "<i2"
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _make_mp3(wav_bytes):
+    """用ffmpeg把WAV转换为MP3，ffmpeg不可用时返回None"""
+    try:
+        audio = audio_decode.AudioSegment.from_file(io.BytesIO(wav_bytes), format="wav")
+        output = io.BytesIO()
+        audio.export(output, format="mp3")
+        return output.getvalue()
+    except Exception:
+        return None
+
+
+class AudioDecodePerformanceTester:
+    """对比进程内解码和ffmpeg子进程解码每秒能处理的句子数"""
+
+    def __init__(self, sentences=50):
+        self.sentences = sentences
+        self.results = []
+
+    def _measure(self, name, func, audio_bytes, file_type):
+        try:
+            func(audio_bytes, file_type)
+        except Exception as e:
+            print(f"⚠️ {name} 不可用: {e}")
+            return
+        start = time.perf_counter()
+        for _ in range(self.sentences):
+            func(audio_bytes, file_type)
+        duration = time.perf_counter() - start
+        sentences_per_second = self.sentences / duration
+        self.results.append(
+            [
+                name,
+                f"{sentences_per_second:.1f}",
+                f"{duration / self.sentences * 1000:.2f}",
+                f"{sentences_per_second * SENTENCE_SECONDS:.0f}x",
+            ]
+        )
+
+    @staticmethod
+    def _ffmpeg(audio_bytes, file_type):
+        return audio_decode._decode_ffmpeg(io.BytesIO(audio_bytes), file_type)
+
+    def run(self):
+        print(
+            f"🔍 开始测试音频解码，每种方式解码 {self.sentences} 句 {SENTENCE_SECONDS} 秒的音频"
+        )
+        for sample_rate, channels in [(16000, 1), (24000, 1), (44100, 2)]:
+            wav_bytes = _make_wav(sample_rate, channels)
+            label = f"WAV {sample_rate}Hz {channels}声道"
+            self._measure(f"{label} 进程内", decode_to_pcm, wav_bytes, "wav")
+            self._measure(f"{label} ffmpeg", self._ffmpeg, wav_bytes, "wav")
+
+        mp3_bytes = _make_mp3(_make_wav(24000, 1))
+        if mp3_bytes is None:
+            print("⚠️ ffmpeg不可用，跳过MP3测试")
+        else:
+            if audio_decode.soundfile is not None:
+                self._measure("MP3 soundfile", decode_to_pcm, mp3_bytes, "mp3")
+            else:
+                print("⚠️ 未安装soundfile，MP3只能使用ffmpeg解码")
+            self._measure("MP3 ffmpeg", self._ffmpeg, mp3_bytes, "mp3")
+
+        headers = ["解码方式", "句/秒", "每句耗时(ms)", "实时倍数"]
+        print("\n音频解码测试结果:")
+        print(tabulate(self.results, headers=headers, tablefmt="github"))
+        print(f"\n解码器调用次数: {audio_decode.get_stats()}")
+
+
+def main():
+    AudioDecodePerformanceTester().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import copy
+import time
+import asyncio
+import logging
+import tracemalloc
+
+from tabulate import tabulate
+
+from config.settings import load_config
+from config.layered_config import LayeredConfig
+from core.connection import ConnectionHandler
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+
+def _apply_private_config(config):
+    """模拟 _initialize_private_config 对连接配置的典型改写"""
+    config["prompt"] = "你是一个叫小智的台湾女孩"
+    config["selected_module"]["TTS"] = config["selected_module"]["TTS"]
+    config["selected_module"]["LLM"] = config["selected_module"]["LLM"]
+    config["summaryMemory"] = ""
+    config["xiaozhi"]["session_id"] = "benchmark"
+
+
+class ConfigPerformanceTester:
+    """对比每个连接深拷贝配置和分层配置的建连耗时与内存占用"""
+
+    def __init__(self, iterations=2000):
+        self.config = load_config()
+        self.iterations = iterations
+        self.results = []
+
+    def _measure(self, name, factory):
+        start = time.perf_counter()
+        for _ in range(self.iterations):
+            _apply_private_config(factory(self.config))
+        duration = time.perf_counter() - start
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        configs = []
+        for _ in range(100):
+            config = factory(self.config)
+            _apply_private_config(config)
+            configs.append(config)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results.append(
+            [
+                name,
+                f"{duration / self.iterations * 1e6:.1f}",
+                f"{(after - before) / len(configs) / 1024:.1f}",
+            ]
+        )
+
+    async def _measure_handshake(self):
+        """完整创建ConnectionHandler的耗时，即握手阶段服务端的同步开销"""
+        start = time.perf_counter()
+        for _ in range(self.iterations):
+            ConnectionHandler(self.config, None, None, None, None, None)
+        duration = time.perf_counter() - start
+        return duration / self.iterations * 1e6
+
+    def run(self):
+        print(f"🔍 开始测试配置创建开销，迭代 {self.iterations} 次")
+        self._measure("copy.deepcopy", copy.deepcopy)
+        self._measure("LayeredConfig", LayeredConfig)
+        handshake_us = asyncio.run(self._measure_handshake())
+        self._print_results(handshake_us)
+
+    def _print_results(self, handshake_us):
+        headers = ["方式", "每连接耗时(μs)", "每连接内存(KB)"]
+        print("\n连接配置创建测试结果:")
+        print(tabulate(self.results, headers=headers, tablefmt="github"))
+        print(f"\nConnectionHandler创建耗时(使用LayeredConfig): {handshake_us:.1f} μs")
+
+
+if __name__ == "__main__":
+    ConfigPerformanceTester().run()
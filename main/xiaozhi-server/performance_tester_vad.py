@@ -0,0 +1,196 @@
+import time
+import asyncio
+import logging
+import tracemalloc
+
+import numpy as np
+from tabulate import tabulate
+
+from config.settings import load_config
+from core.utils.vad import create_instance as create_vad_instance
+from core.utils.inference import init_inference_executor
+from core.providers.vad.base import PcmRingBuffer
+from core.providers.vad.silero import CHUNK_SAMPLES, SileroState, SileroBatchScheduler
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+# 每个连接每秒产生的音频块数量（16kHz / 512采样点）
+CHUNKS_PER_SECOND = 16000 / CHUNK_SAMPLES
+# 每个上行opus帧的采样点数（60ms）
+FRAME_SAMPLES = 960
+# 每个连接每秒上传的帧数
+FRAMES_PER_SECOND = 16000 / FRAME_SAMPLES
+
+
+def _bytearray_process(state, pcm_frame):
+    """原实现：bytearray切片取块，每块单独转换为float32"""
+    state["buffer"].extend(pcm_frame)
+    chunks = []
+    while len(state["buffer"]) >= CHUNK_SAMPLES * 2:
+        chunk = state["buffer"][: CHUNK_SAMPLES * 2]
+        state["buffer"] = state["buffer"][CHUNK_SAMPLES * 2 :]
+        audio_int16 = np.frombuffer(chunk, dtype=np.int16)
+        chunks.append(audio_int16.astype(np.float32) / 32768.0)
+    return chunks
+
+
+def _ring_buffer_process(state, pcm_frame):
+    """环形缓冲区：预分配数组，全部完整块一次向量化归一化"""
+    state["buffer"].write(pcm_frame)
+    return state["buffer"].read_chunks()
+
+
+class VADBufferPerformanceTester:
+    """对比VAD音频块累积方式的处理速度和内存分配量，不需要加载模型"""
+
+    def __init__(self, frames=20000):
+        self.frames = frames
+        rng = np.random.default_rng(0)
+        self.pcm_frames = [
+            (rng.standard_normal(FRAME_SAMPLES) * 3000).astype(np.int16).tobytes()
+            for _ in range(256)
+        ]
+        self.results = []
+
+    def _measure(self, name, process, new_state):
+        state = new_state()
+        start = time.perf_counter()
+        for i in range(self.frames):
+            process(state, self.pcm_frames[i % len(self.pcm_frames)])
+        duration = time.perf_counter() - start
+
+        # 统计每帧处理过程中临时分配的内存
+        state = new_state()
+        allocated = 0
+        sample_frames = min(self.frames, 2000)
+        tracemalloc.start()
+        for i in range(sample_frames):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            process(state, self.pcm_frames[i % len(self.pcm_frames)])
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+        tracemalloc.stop()
+        bytes_per_frame = allocated / sample_frames
+
+        self.results.append(
+            [
+                name,
+                f"{self.frames / duration:.0f}",
+                f"{bytes_per_frame:.0f}",
+                f"{bytes_per_frame * FRAMES_PER_SECOND / 1024:.1f}",
+                f"{bytes_per_frame * self.frames / duration / 1024 / 1024:.1f}",
+            ]
+        )
+
+    def run(self):
+        print(f"🔍 开始测试VAD音频缓冲区，处理 {self.frames} 个{FRAME_SAMPLES}采样点的帧")
+        self._measure(
+            "bytearray切片", _bytearray_process, lambda: {"buffer": bytearray()}
+        )
+        self._measure(
+            "PcmRingBuffer",
+            _ring_buffer_process,
+            lambda: {"buffer": PcmRingBuffer(CHUNK_SAMPLES)},
+        )
+        headers = [
+            "方式",
+            "帧/秒",
+            "每帧分配(字节)",
+            "每连接分配(KB/秒)",
+            "满载分配(MB/秒)",
+        ]
+        print("\nVAD音频缓冲区测试结果:")
+        print(tabulate(self.results, headers=headers, tablefmt="github"))
+
+
+class VADPerformanceTester:
+    """测试Silero VAD在不同连接数下的吞吐量（音频块/秒）"""
+
+    def __init__(self, connection_counts=(1, 10, 50, 100, 300), chunks_per_conn=60):
+        self.config = load_config()
+        self.connection_counts = connection_counts
+        self.chunks_per_conn = chunks_per_conn
+        self.results = []
+
+        init_inference_executor(self.config)
+        vad_name = self.config["selected_module"]["VAD"]
+        vad_config = self.config["VAD"][vad_name]
+        self.vad = create_vad_instance(vad_config.get("type", vad_name), vad_config)
+        self.batch_window_ms = float(vad_config.get("batch_window_ms", 5) or 5)
+        self.max_batch_size = int(vad_config.get("max_batch_size", 64) or 64)
+
+    async def _run_connection(self, scheduler, chunks):
+        vad_state = SileroState()
+        for chunk in chunks:
+            await scheduler.infer(chunk, vad_state)
+
+    async def _measure(self, conn_count, batch_window_ms):
+        scheduler = SileroBatchScheduler(
+            self.vad.model_dir, batch_window_ms, self.max_batch_size
+        )
+        rng = np.random.default_rng(0)
+        audios = [
+            (rng.standard_normal((self.chunks_per_conn, CHUNK_SAMPLES)) * 0.1).astype(
+                np.float32
+            )
+            for _ in range(conn_count)
+        ]
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[self._run_connection(scheduler, audio) for audio in audios]
+        )
+        duration = time.perf_counter() - start
+        stats = scheduler.get_stats()
+        return stats["chunks"] / duration, stats["avg_batch_size"]
+
+    async def run(self):
+        print(
+            f"🔍 开始测试VAD吞吐量，每个连接 {self.chunks_per_conn} 个音频块，"
+            f"批量窗口 {self.batch_window_ms}ms，最大批量 {self.max_batch_size}"
+        )
+        for conn_count in self.connection_counts:
+            serial_throughput, _ = await self._measure(conn_count, 0)
+            batch_throughput, avg_batch = await self._measure(
+                conn_count, self.batch_window_ms
+            )
+            self.results.append(
+                [
+                    conn_count,
+                    f"{serial_throughput:.0f}",
+                    f"{batch_throughput:.0f}",
+                    f"{avg_batch:.1f}",
+                    f"{batch_throughput / serial_throughput:.2f}x",
+                    f"{batch_throughput / CHUNKS_PER_SECOND:.0f}",
+                ]
+            )
+            print(f"✓ 连接数 {conn_count} 测试完成")
+        self._print_results()
+
+    def _print_results(self):
+        headers = [
+            "连接数",
+            "逐块推理(块/秒)",
+            "批量推理(块/秒)",
+            "平均批量",
+            "加速比",
+            "实时可支撑连接数",
+        ]
+        print("\nVAD吞吐量测试结果:")
+        print(tabulate(self.results, headers=headers, tablefmt="github"))
+        print(
+            f"\n说明: 每个连接实时产生 {CHUNKS_PER_SECOND:.2f} 块/秒，"
+            "实时可支撑连接数 = 批量推理吞吐量 / 单连接实时块速率"
+        )
+
+
+async def main():
+    VADBufferPerformanceTester().run()
+    tester = VADPerformanceTester()
+    await tester.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())